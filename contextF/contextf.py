@@ -1,23 +1,36 @@
+import functools
+import hashlib
+import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional, Union, Tuple
+from .core.cache import SQLiteCache
 from .core.config import ConfigManager
+from .core.files import FileCache
 from .core.search import SearchEngine
+from .core.semantic_cache import SemanticCache
 from .core.text_processor import TextProcessor
 from .exceptions import ContextFError, ConfigurationError, SearchError
-from dotenv import load_dotenv
-load_dotenv()
-try:
-    from openai import OpenAI
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-    OpenAI = None
+
+# Whether the .env file has been loaded (done once, on first use)
+_dotenv_loaded = False
+
+def _load_dotenv_once():
+    """Load environment variables from .env the first time this is called"""
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _dotenv_loaded = True
 
 class ContextBuilder:
     """
     Main class for building context from documents using configurable search patterns
     """
     
+    # Maximum number of concurrent LLM requests made by batch methods
+    MAX_LLM_WORKERS = 8
+    
     def __init__(self, 
                  config_path: Optional[str] = None,
                  openai_api_key: Optional[str] = None,
@@ -47,26 +60,65 @@ class ContextBuilder:
         # Initialize configuration
         self.config_manager = ConfigManager(config_path, **config_overrides)
         
-        # Initialize components
-        self.search_engine = SearchEngine(self.config_manager.get_search_config())
+        # Initialize components; files read during search are shared with
+        # text processing through the file cache
+        self.file_cache = FileCache()
+        
+        # Persistent caches are opt-in
+        cache_config = self.config_manager.get_cache_config()
+        self.match_cache = None
+        self.pattern_cache = None
+        if cache_config.get('enable_cache', False):
+            max_entries = cache_config.get('cache_max_entries')
+            self.match_cache = SQLiteCache(cache_config['cache_dir'], 'matches', max_entries)
+            self.pattern_cache = SQLiteCache(cache_config['cache_dir'], 'patterns', max_entries)
+        
+        # Optional cache that reuses patterns generated for similar queries,
+        # saved alongside the persistent caches when those are enabled
+        self.semantic_cache = None
+        if cache_config.get('semantic_cache', False):
+            enable_cache = cache_config.get('enable_cache', False)
+            self.semantic_cache = SemanticCache(
+                cache_config.get('semantic_cache_model', 'all-MiniLM-L6-v2'),
+                cache_config.get('semantic_cache_threshold', 0.92),
+                cache_dir=cache_config['cache_dir'] if enable_cache else None,
+                max_entries=cache_config.get('cache_max_entries')
+            )
+        
+        # In-memory cache of LLM generated patterns, in front of the persistent one
+        self._cached_generate_patterns = functools.lru_cache(maxsize=256)(
+            self._generate_patterns_uncached
+        )
+        
+        self.search_engine = SearchEngine(
+            self.config_manager.get_search_config(), self.file_cache, self.match_cache
+        )
         self.text_processor = TextProcessor({
             'tokens': self.config_manager.get_token_config(),
             'text_processing': self.config_manager.get_text_processing_config()
-        })
+        }, self.file_cache)
         
-        # Initialize OpenAI client if API key provided and LLM enabled
+        # Initialize OpenAI client if API key provided and LLM enabled; openai
+        # is imported here as it is slow to load
         self.openai_client = None
         llm_config = self.config_manager.get_llm_config()
         
-        if llm_config.get('enabled', True) and OPENAI_AVAILABLE:
-            api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
-            if api_key:
-                try:
-                    self.openai_client = OpenAI(api_key=api_key)
-                except Exception as e:
-                    raise ConfigurationError(f"Failed to initialize OpenAI client: {e}")
-        elif llm_config.get('enabled', True) and not OPENAI_AVAILABLE:
-            print("Warning: OpenAI not available. Install with: pip install openai")
+        if llm_config.get('enabled', True):
+            try:
+                from openai import OpenAI
+            except ImportError:
+                OpenAI = None
+                print("Warning: OpenAI not available. Install with: pip install openai")
+            
+            if OpenAI is not None:
+                if not openai_api_key:
+                    _load_dotenv_once()
+                api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
+                if api_key:
+                    try:
+                        self.openai_client = OpenAI(api_key=api_key)
+                    except Exception as e:
+                        raise ConfigurationError(f"Failed to initialize OpenAI client: {e}")
     
     def generate_search_patterns(self, query: str) -> List[str]:
         """
@@ -79,33 +131,140 @@ class ContextBuilder:
             List of search patterns
         """
         llm_config = self.config_manager.get_llm_config()
-        max_patterns = self.config_manager.get('search.max_patterns_per_query', 3)
+        max_patterns = self.config_manager.max_patterns_per_query
         
         if not llm_config.get('enabled', True) or not self.openai_client:
             # Fallback to using query as pattern
             return [query.strip()]
         
         try:
-            prompt_template = llm_config.get('pattern_generation_prompt', 
-                "Generate search patterns for: {query}")
-            prompt = prompt_template.format(query=query, max_patterns=max_patterns)
-            
-            response = self.openai_client.chat.completions.create(
-                model=llm_config.get('model', 'gpt-4.1-mini'),
-                messages=[{"role": "user", "content": prompt}],
-                temperature=llm_config.get('temperature', 0.3)
+            # Reuse patterns generated for a query with the same meaning
+            if self.semantic_cache is not None:
+                try:
+                    similar_patterns = self.semantic_cache.get(query)
+                except Exception as e:
+                    # A failing cache is a miss; the LLM is still asked
+                    print(f"Warning: Semantic cache lookup failed: {e}")
+                    similar_patterns = None
+                if similar_patterns is not None:
+                    return list(similar_patterns)
+            
+            # A legacy single-message prompt takes precedence when configured;
+            # otherwise the static instructions go in a system message so the
+            # provider can cache that prefix across queries
+            if 'pattern_generation_prompt' in llm_config:
+                system_prompt = None
+                prompt_template = llm_config['pattern_generation_prompt']
+            else:
+                system_prompt = llm_config.get('system_prompt')
+                prompt_template = llm_config.get('user_prompt_template',
+                    "Generate search patterns for: {query}")
+            
+            patterns = self._cached_generate_patterns(
+                query,
+                llm_config.get('model', 'gpt-4.1-mini'),
+                llm_config.get('temperature', 0.0),
+                system_prompt,
+                prompt_template,
+                max_patterns
             )
             
-            patterns = response.choices[0].message.content.strip().split('\n')
-            patterns = [p.strip() for p in patterns if p.strip()][:max_patterns]
+            if patterns and self.semantic_cache is not None:
+                try:
+                    self.semantic_cache.add(query, patterns)
+                except Exception as e:
+                    print(f"Warning: Semantic cache update failed: {e}")
             
-            return patterns if patterns else [query.strip()]
+            return list(patterns) if patterns else [query.strip()]
             
         except Exception as e:
             # Fallback to query if LLM fails
             print(f"Warning: LLM pattern generation failed, using query as pattern: {e}")
             return [query.strip()]
     
+    def generate_search_patterns_batch(self, queries: List[str]) -> List[List[str]]:
+        """
+        Generate search patterns for several queries concurrently
+        
+        Each distinct query is sent as its own request, all sharing the same
+        system prompt, and requests run in parallel threads.
+        
+        Args:
+            queries: Search queries
+        
+        Returns:
+            List of search patterns for each query, in input order
+        """
+        unique_queries = list(dict.fromkeys(queries))
+        if len(unique_queries) <= 1:
+            patterns_by_query = {query: self.generate_search_patterns(query)
+                                 for query in unique_queries}
+        else:
+            max_workers = min(len(unique_queries), self.MAX_LLM_WORKERS)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                patterns_by_query = dict(zip(
+                    unique_queries, executor.map(self.generate_search_patterns, unique_queries)
+                ))
+        
+        return [list(patterns_by_query[query]) for query in queries]
+    
+    def _generate_patterns_uncached(self, query: str, model: str, temperature: float,
+                                    system_prompt: Optional[str], prompt_template: str,
+                                    max_patterns: int) -> Tuple[str, ...]:
+        """
+        Generate search patterns with the LLM, consulting the persistent cache first
+        
+        All arguments that affect the response are part of the cache key. LLM
+        errors are raised (and so never cached) for the caller to handle; cache
+        errors are treated as misses so the LLM is still asked.
+        
+        Args:
+            query: Search query
+            model: OpenAI model name
+            temperature: Sampling temperature
+            system_prompt: Static system message, or None to send only the user message
+            prompt_template: User message template with {query} and {max_patterns} fields
+            max_patterns: Maximum number of patterns to return
+        
+        Returns:
+            Tuple of generated patterns (may be empty)
+        """
+        cache_key = None
+        if self.pattern_cache is not None:
+            key_data = json.dumps([query, model, temperature, system_prompt, prompt_template,
+                                   max_patterns])
+            cache_key = hashlib.sha1(key_data.encode('utf-8')).hexdigest()
+            try:
+                cached = self.pattern_cache.get(cache_key)
+            except Exception as e:
+                print(f"Warning: Pattern cache lookup failed: {e}")
+                cached = None
+            if cached is not None:
+                return tuple(cached)
+        
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        prompt = prompt_template.format(query=query, max_patterns=max_patterns)
+        messages.append({"role": "user", "content": prompt})
+        
+        response = self.openai_client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature
+        )
+        
+        patterns = response.choices[0].message.content.strip().split('\n')
+        patterns = tuple([p.strip() for p in patterns if p.strip()][:max_patterns])
+        
+        if cache_key is not None:
+            try:
+                self.pattern_cache.set(cache_key, list(patterns))
+            except Exception as e:
+                print(f"Warning: Pattern cache update failed: {e}")
+        
+        return patterns
+    
     def build_context(self, 
                      query: Optional[str] = None, 
                      patterns: Optional[List[str]] = None,
@@ -137,10 +296,74 @@ class ContextBuilder:
         
         # Use provided patterns or generate from query
         if patterns:
-            search_patterns = patterns[:self.config_manager.get('search.max_patterns_per_query', 3)]
+            search_patterns = patterns[:self.config_manager.max_patterns_per_query]
         else:
             search_patterns = self.generate_search_patterns(query)
         
+        try:
+            return self._build_context_from_patterns(search_patterns, docs_path, file_patterns)
+        finally:
+            # Cached contents are only valid for this call
+            self.file_cache.clear()
+    
+    def build_context_batch(self,
+                            queries: List[str],
+                            docs_path: Optional[str] = None,
+                            file_patterns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Build context for several queries
+        
+        Patterns for all queries are generated concurrently. Files read while
+        searching are shared across the batch, and queries that end up with the
+        same patterns are searched only once.
+        
+        Args:
+            queries: Search queries
+            docs_path: Path to documents directory (overrides config)
+            file_patterns: File patterns to search (overrides config)
+        
+        Returns:
+            List of results as returned by build_context, one per query in input order
+        
+        Raises:
+            ContextFError: If no queries or an empty query are provided
+            SearchError: If search fails
+        """
+        if not queries or not all(queries):
+            raise ContextFError("'queries' must be a non-empty list of non-empty queries")
+        
+        patterns_per_query = self.generate_search_patterns_batch(queries)
+        
+        results_by_patterns: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+        try:
+            for search_patterns in patterns_per_query:
+                key = tuple(search_patterns)
+                if key not in results_by_patterns:
+                    results_by_patterns[key] = self._build_context_from_patterns(
+                        search_patterns, docs_path, file_patterns
+                    )
+        finally:
+            # Cached contents are only valid for this call
+            self.file_cache.clear()
+        
+        return [dict(results_by_patterns[tuple(search_patterns)])
+                for search_patterns in patterns_per_query]
+    
+    def _build_context_from_patterns(self,
+                                     search_patterns: List[str],
+                                     docs_path: Optional[str] = None,
+                                     file_patterns: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Build context from documents for the given search patterns
+        
+        Args:
+            search_patterns: Search patterns to look for
+            docs_path: Path to documents directory (overrides config)
+            file_patterns: File patterns to search (overrides config)
+        
+        Returns:
+            Result dictionary as described in build_context
+        """
         # Get search configuration
         search_config = self.config_manager.get_search_config()
         docs_path = docs_path or search_config['docs_path']
@@ -177,7 +400,7 @@ class ContextBuilder:
             context_parts = []
             total_context_tokens = 0
             files_used = {}
-            max_context_tokens = self.config_manager.get('tokens.max_context_tokens')
+            max_context_tokens = self.config_manager.max_context_tokens
             
             for filename, matches in sorted_files:
                 if total_context_tokens >= max_context_tokens:
@@ -202,7 +425,7 @@ class ContextBuilder:
                     files_used[filename] = {
                         'matches': len(unique_matches),
                         'tokens': file_tokens,
-                        'patterns_found': list(set(match['pattern'] for match in unique_matches))
+                        'patterns_found': unique_matches.patterns_found()
                     }
             
             # Merge all context parts
@@ -215,7 +438,8 @@ class ContextBuilder:
                 "context": final_context,
                 "context_tokens": total_context_tokens,
                 "files_used": files_used,
-                "matches": all_file_matches
+                "matches": {filename: matches.to_list()
+                            for filename, matches in all_file_matches.items()}
             }
             
         except Exception as e:
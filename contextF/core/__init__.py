@@ -3,7 +3,8 @@ Core modules for contextF library
 """
 
 from .config import ConfigManager
+from .matches import MatchBatch
 from .search import SearchEngine
 from .text_processor import TextProcessor
 
-__all__ = ["ConfigManager", "SearchEngine", "TextProcessor"]
+__all__ = ["ConfigManager", "MatchBatch", "SearchEngine", "TextProcessor"]
@@ -0,0 +1,125 @@
+import json
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Iterable, Optional, Tuple
+from ..exceptions import ConfigurationError
+
+logger = logging.getLogger(__name__)
+
+class SQLiteCache:
+    """
+    Persistent key-value cache stored in a SQLite database, values are JSON encoded
+    
+    Each table keeps at most max_entries rows; the least recently written rows
+    are evicted first. Database errors (e.g. another process holding the lock)
+    are logged and treated as misses, so a cache never fails the caller.
+    """
+    
+    DB_FILENAME = "contextF.db"
+    # Default number of rows kept per table
+    MAX_ENTRIES = 100000
+    # Seconds to wait for a lock held by another connection before giving up
+    LOCK_TIMEOUT = 0.5
+    
+    def __init__(self, cache_dir: str, table: str, max_entries: Optional[int] = None):
+        """
+        Initialize cache
+        
+        Args:
+            cache_dir: Directory holding the cache database (created if missing)
+            table: Name of the table used for this cache
+            max_entries: Number of rows kept in the table (default: MAX_ENTRIES)
+        
+        Raises:
+            ConfigurationError: If the cache database cannot be opened
+        """
+        self.table = table
+        self.max_entries = max_entries or self.MAX_ENTRIES
+        self._lock = threading.Lock()
+        
+        try:
+            cache_path = Path(cache_dir).expanduser()
+            cache_path.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(cache_path / self.DB_FILENAME),
+                                         timeout=self.LOCK_TIMEOUT, check_same_thread=False)
+            with self._conn:
+                self._conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+                )
+            # Upper bound on the row count, so the table is only counted when it may be full
+            self._row_estimate = self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        except (OSError, sqlite3.Error) as e:
+            raise ConfigurationError(f"Failed to open cache in {cache_dir}: {e}")
+    
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Get a cached value
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            Cached value, or None on a miss
+        """
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    f"SELECT value FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Cache lookup in %s failed: %s", self.table, e)
+            return None
+        return json.loads(row[0]) if row else None
+    
+    def set(self, key: str, value: Any):
+        """
+        Store a value
+        
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+        """
+        self.set_many([(key, value)])
+    
+    def set_many(self, items: Iterable[Tuple[str, Any]]):
+        """
+        Store several values in a single transaction
+        
+        Rows beyond max_entries are evicted, least recently written first
+        (a replaced row gets a new rowid, so rowid order is write order).
+        
+        Args:
+            items: (key, value) pairs with JSON-serializable values
+        """
+        rows = [(key, json.dumps(value)) for key, value in items]
+        if not rows:
+            return
+        
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value) VALUES (?, ?)", rows
+                )
+                self._row_estimate += len(rows)
+                if self._row_estimate > self.max_entries:
+                    self._evict()
+        except sqlite3.Error as e:
+            logger.warning("Cache update in %s failed: %s", self.table, e)
+    
+    def _evict(self):
+        """Delete the oldest rows beyond max_entries (called with the lock held)"""
+        row_count = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        if row_count > self.max_entries:
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE rowid IN "
+                f"(SELECT rowid FROM {self.table} ORDER BY rowid LIMIT ?)",
+                (row_count - self.max_entries,)
+            )
+        self._row_estimate = min(row_count, self.max_entries)
+    
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
@@ -1,9 +1,15 @@
+import functools
 import json
 import os
 from pathlib import Path
-from typing import Dict, Any, Optional, List, Union
+from typing import Dict, Any, Optional, List, Tuple, Union
 from ..exceptions import ConfigurationError
 
+@functools.lru_cache(maxsize=256)
+def _split_key(key: str) -> Tuple[str, ...]:
+    """Split a dot notation key into its parts (memoized)"""
+    return tuple(key.split('.'))
+
 class ConfigManager:
     """Manages configuration loading and validation"""
     
@@ -51,14 +57,19 @@ class ConfigManager:
         """Apply configuration overrides"""
         # Handle direct parameter overrides
         for key, value in overrides.items():
-            if key in ['docs_path', 'file_patterns', 'max_patterns_per_query', 'max_matches_per_file', 'case_sensitive']:
+            if key in ['docs_path', 'file_patterns', 'max_patterns_per_query', 'max_matches_per_file', 'case_sensitive',
+                       'max_workers', 'max_file_bytes', 'skip_binary', 'mmap_threshold']:
                 self.config['search'][key] = value
             elif key in ['context_window_tokens', 'max_context_tokens', 'max_file_tokens', 'encoding']:
                 self.config['tokens'][key] = value
             elif key in ['chunk_size', 'chunk_overlap', 'merge_overlapping_windows']:
                 self.config['text_processing'][key] = value
-            elif key in ['enabled', 'model', 'temperature', 'pattern_generation_prompt']:
+            elif key in ['enabled', 'model', 'temperature', 'system_prompt', 'user_prompt_template',
+                         'pattern_generation_prompt']:
                 self.config['llm'][key] = value
+            elif key in ['enable_cache', 'cache_dir', 'cache_max_entries', 'semantic_cache',
+                         'semantic_cache_model', 'semantic_cache_threshold']:
+                self.config['cache'][key] = value
             else:
                 # For nested overrides, use dot notation
                 if '.' in key:
@@ -119,6 +130,20 @@ class ConfigManager:
                 raise ValueError("max_patterns_per_query must be positive")
             if search['max_matches_per_file'] <= 0:
                 raise ValueError("max_matches_per_file must be positive")
+            if search.get('max_workers') is not None and search['max_workers'] <= 0:
+                raise ValueError("max_workers must be positive")
+            if search.get('max_file_bytes') is not None and search['max_file_bytes'] <= 0:
+                raise ValueError("max_file_bytes must be positive")
+            if search.get('mmap_threshold') is not None and search['mmap_threshold'] < 0:
+                raise ValueError("mmap_threshold must be non-negative")
+            
+            # Validate cache parameters
+            max_entries = self.config['cache'].get('cache_max_entries')
+            if max_entries is not None and max_entries <= 0:
+                raise ValueError("cache_max_entries must be positive")
+            threshold = self.config['cache'].get('semantic_cache_threshold', 0.92)
+            if not -1 <= threshold <= 1:
+                raise ValueError("semantic_cache_threshold must be between -1 and 1")
             
             # Validate file patterns
             if not search['file_patterns']:
@@ -135,15 +160,39 @@ class ConfigManager:
     
     def get(self, key: str, default: Any = None) -> Any:
         """Get configuration value using dot notation"""
-        keys = key.split('.')
         value = self.config
         try:
-            for k in keys:
+            for k in _split_key(key):
                 value = value[k]
             return value
         except (KeyError, TypeError):
             return default
     
+    @property
+    def max_patterns_per_query(self) -> int:
+        """Maximum number of search patterns per query"""
+        return self.config['search']['max_patterns_per_query']
+    
+    @property
+    def max_matches_per_file(self) -> int:
+        """Maximum number of matches considered per file"""
+        return self.config['search']['max_matches_per_file']
+    
+    @property
+    def context_window_tokens(self) -> int:
+        """Size of the context window around matches, in tokens"""
+        return self.config['tokens']['context_window_tokens']
+    
+    @property
+    def max_context_tokens(self) -> int:
+        """Maximum total context tokens"""
+        return self.config['tokens']['max_context_tokens']
+    
+    @property
+    def max_file_tokens(self) -> int:
+        """Maximum tokens per file before windowing"""
+        return self.config['tokens']['max_file_tokens']
+    
     def get_search_config(self) -> Dict[str, Any]:
         """Get search configuration"""
         return self.config['search']
@@ -159,3 +208,7 @@ class ConfigManager:
     def get_text_processing_config(self) -> Dict[str, Any]:
         """Get text processing configuration"""
         return self.config['text_processing']
+    
+    def get_cache_config(self) -> Dict[str, Any]:
+        """Get cache configuration"""
+        return self.config['cache']
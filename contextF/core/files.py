@@ -0,0 +1,226 @@
+import fnmatch
+import os
+import re
+import threading
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+# Number of leading bytes inspected to detect binary files
+BINARY_PROBE_BYTES = 8192
+
+def read_text_file(filename: str, max_bytes: Optional[int] = None,
+                   skip_binary: bool = False) -> Optional[str]:
+    """
+    Read a whole file as UTF-8 text with a single read call
+    
+    Undecodable bytes are dropped and line endings are normalized to '\\n',
+    matching what text-mode reading with universal newlines produces.
+    
+    Args:
+        filename: Path to file
+        max_bytes: Skip files larger than this many bytes
+        skip_binary: Skip files with a NUL byte in their first BINARY_PROBE_BYTES
+    
+    Returns:
+        File content as string, or None if the file was skipped
+    """
+    with open(filename, 'rb') as f:
+        if max_bytes is not None and os.fstat(f.fileno()).st_size > max_bytes:
+            return None
+        return read_open_text_file(f, skip_binary)
+
+def read_open_text_file(f: BinaryIO, skip_binary: bool = False) -> Optional[str]:
+    """
+    Read the rest of a file opened in binary mode as text, like read_text_file
+    
+    Args:
+        f: File opened in binary mode
+        skip_binary: Skip files with a NUL byte in their first BINARY_PROBE_BYTES
+    
+    Returns:
+        File content as string, or None if the file was skipped
+    """
+    if skip_binary:
+        data = f.read(BINARY_PROBE_BYTES)
+        if b'\x00' in data:
+            return None
+        rest = f.read()
+        if rest:
+            data += rest
+    else:
+        data = f.read()
+    
+    return decode_text(data)
+
+def decode_text(data: bytes) -> str:
+    """
+    Decode file bytes the way read_text_file does
+    
+    Args:
+        data: Raw file content
+    
+    Returns:
+        UTF-8 text with undecodable bytes dropped and '\\n' line endings
+    """
+    text = data.decode('utf-8', errors='ignore')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+def compile_name_patterns(file_patterns: List[str]) -> List[re.Pattern]:
+    """
+    Compile glob patterns for matching file names the way find_files does
+    
+    Args:
+        file_patterns: Glob patterns (e.g. ['*.md'])
+    
+    Returns:
+        Compiled regexes, case-insensitive on Windows
+    """
+    flags = re.IGNORECASE if os.name == 'nt' else 0
+    return [re.compile(fnmatch.translate(pattern), flags) for pattern in file_patterns]
+
+def find_files(root: str, file_patterns: List[str], recursive: bool = True) -> List[str]:
+    """
+    Find files whose names match any of the given patterns
+    
+    The tree is walked once with os.scandir for all patterns, and directory
+    entry types come from the scan itself, so no extra stat call is needed per
+    entry. Patterns containing a path (e.g. 'sub/*.md' or '**/*.md') are
+    expanded with Path.rglob (Path.glob if not recursive) instead. Files are
+    ordered like successive Path.rglob calls would return them (grouped by the
+    first pattern they match, directories in pre-order), but each file is
+    listed only once. The walk does not follow symlinked directories.
+    
+    Args:
+        root: Directory to search
+        file_patterns: Glob patterns matched against file names (e.g. ['*.md']),
+            or against paths relative to root when they contain a separator
+        recursive: Whether to search subdirectories
+    
+    Returns:
+        List of matching file paths
+    """
+    separators = {'/', os.sep}
+    path_patterns = [(index, pattern) for index, pattern in enumerate(file_patterns)
+                     if separators.intersection(pattern)]
+    name_patterns = [(index, name_pattern) for index, name_pattern
+                     in enumerate(compile_name_patterns(file_patterns))
+                     if not separators.intersection(file_patterns[index])]
+    
+    root_path = Path(root)
+    root = str(root_path)
+    found: List[Tuple[int, str]] = []
+    directories = [root] if name_patterns else []
+    
+    for pattern_index, pattern in path_patterns:
+        matches = root_path.rglob(pattern) if recursive else root_path.glob(pattern)
+        found.extend((pattern_index, str(path)) for path in matches if path.is_file())
+    
+    while directories:
+        directory = directories.pop()
+        try:
+            with os.scandir(directory) as entries:
+                entries = list(entries)
+        except PermissionError:
+            continue
+        
+        subdirectories = []
+        for entry in entries:
+            path = entry.name if directory == '.' else os.path.join(directory, entry.name)
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirectories.append(path)
+                    continue
+                
+                for pattern_index, name_pattern in name_patterns:
+                    if name_pattern.match(entry.name):
+                        if entry.is_file():
+                            found.append((pattern_index, path))
+                        break
+            except OSError:
+                continue
+        
+        if recursive:
+            # Reversed so the first subdirectory is popped (and walked) first
+            directories.extend(reversed(subdirectories))
+    
+    found.sort(key=lambda item: item[0])
+    if not path_patterns:
+        return [path for _, path in found]
+    # A file can match both a name and a path pattern; keep its first listing
+    return list(dict.fromkeys(path for _, path in found))
+
+class CachedFile:
+    """File content shared between the search and text processing stages"""
+    
+    def __init__(self, content: str):
+        """
+        Initialize cached file
+        
+        Args:
+            content: Full file content
+        """
+        self.content = content
+        self.token_count: Optional[int] = None
+        self._lines: Optional[List[str]] = None
+    
+    @property
+    def lines(self) -> List[str]:
+        """File content split on newlines (computed once)"""
+        if self._lines is None:
+            self._lines = self.content.split('\n')
+        return self._lines
+
+class FileCache:
+    """Thread-safe cache of file contents keyed by absolute path"""
+    
+    def __init__(self):
+        """Initialize an empty file cache"""
+        self._files: Dict[str, CachedFile] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, filename: str) -> Optional[CachedFile]:
+        """
+        Get a cached file
+        
+        Args:
+            filename: Path to file
+        
+        Returns:
+            Cached file, or None if the file is not cached
+        """
+        with self._lock:
+            return self._files.get(os.path.abspath(filename))
+    
+    def put(self, filename: str, cached_file: CachedFile):
+        """
+        Store a file in the cache
+        
+        Args:
+            filename: Path to file
+            cached_file: Cached file content
+        """
+        with self._lock:
+            self._files[os.path.abspath(filename)] = cached_file
+    
+    def load(self, filename: str) -> CachedFile:
+        """
+        Get a cached file, reading and caching it on a miss
+        
+        Args:
+            filename: Path to file
+        
+        Returns:
+            Cached file
+        """
+        cached_file = self.get(filename)
+        if cached_file is None:
+            cached_file = CachedFile(read_text_file(filename))
+            self.put(filename, cached_file)
+        return cached_file
+    
+    def clear(self):
+        """Remove all cached files"""
+        with self._lock:
+            self._files.clear()
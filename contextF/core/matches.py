@@ -0,0 +1,114 @@
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Sequence
+
+class MatchBatch:
+    """
+    Matches found in one file, stored column-wise
+    
+    Line numbers and pattern ids live in compact typed arrays rather than one
+    dictionary per match; patterns are stored once and referenced by id.
+    Iterating or indexing still yields the familiar match dictionaries.
+    """
+    
+    def __init__(self, patterns: Sequence[str]):
+        """
+        Initialize an empty batch
+        
+        Args:
+            patterns: Search patterns; pattern ids index into this sequence
+        """
+        self.patterns = tuple(patterns)
+        self.line_nums = array('l')
+        self.texts: List[str] = []
+        self.pattern_ids = array('l')
+    
+    def append(self, line_num: int, text: str, pattern_id: int):
+        """
+        Add a match
+        
+        Args:
+            line_num: 1-based line number of the match
+            text: Text of the matching line
+            pattern_id: Index of the matching pattern
+        """
+        self.line_nums.append(line_num)
+        self.texts.append(text)
+        self.pattern_ids.append(pattern_id)
+    
+    def select(self, indices: Iterable[int]) -> "MatchBatch":
+        """
+        Create a new batch holding a subset of the matches
+        
+        Args:
+            indices: Positions of the matches to keep, in the order to keep them
+        
+        Returns:
+            New match batch
+        """
+        batch = MatchBatch(self.patterns)
+        for i in indices:
+            batch.append(self.line_nums[i], self.texts[i], self.pattern_ids[i])
+        return batch
+    
+    def patterns_found(self) -> List[str]:
+        """
+        Get the distinct patterns that matched
+        
+        Returns:
+            List of patterns, in pattern order
+        """
+        return [self.patterns[i] for i in sorted(set(self.pattern_ids))]
+    
+    def to_list(self) -> List[Dict[str, Any]]:
+        """
+        Convert to a list of match dictionaries with line_num, text, and pattern
+        
+        Returns:
+            List of match dictionaries
+        """
+        return list(self)
+    
+    def to_columns(self) -> Dict[str, list]:
+        """
+        Convert to JSON-serializable columns (see from_columns)
+        
+        Returns:
+            Dictionary with line_nums, texts, and pattern_ids lists
+        """
+        return {
+            'line_nums': self.line_nums.tolist(),
+            'texts': list(self.texts),
+            'pattern_ids': self.pattern_ids.tolist()
+        }
+    
+    @classmethod
+    def from_columns(cls, patterns: Sequence[str], columns: Dict[str, list]) -> "MatchBatch":
+        """
+        Rebuild a batch from the output of to_columns
+        
+        Args:
+            patterns: Search patterns the pattern ids refer to
+            columns: Dictionary with line_nums, texts, and pattern_ids lists
+        
+        Returns:
+            Match batch
+        """
+        batch = cls(patterns)
+        batch.line_nums.extend(columns['line_nums'])
+        batch.texts.extend(columns['texts'])
+        batch.pattern_ids.extend(columns['pattern_ids'])
+        return batch
+    
+    def __len__(self) -> int:
+        return len(self.texts)
+    
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        return {
+            'line_num': self.line_nums[index],
+            'text': self.texts[index],
+            'pattern': self.patterns[self.pattern_ids[index]]
+        }
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self[i]
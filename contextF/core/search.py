@@ -1,24 +1,155 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, BinaryIO, Iterator, Optional, Tuple
+from .cache import SQLiteCache
+from .files import BINARY_PROBE_BYTES, CachedFile, FileCache, find_files, read_open_text_file
+from .matches import MatchBatch
 from ..exceptions import SearchError, FileProcessingError
 
+try:
+    import ahocorasick_rs
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+class _CompiledPatterns:
+    """
+    Search patterns compiled for one search, never modified after creation
+    
+    All patterns are compiled into a single alternation regex in which each
+    pattern gets its own named group, so a hit can be traced back to the
+    pattern through the match's lastgroup. Every pattern is also compiled on
+    its own, for checking the others once a line has a hit. When every pattern
+    is ASCII, the (lowercased) patterns are also kept for plain substring
+    matching, which is cheaper than the regex for the literal search we do.
+    With many patterns and ahocorasick_rs installed, they are compiled into an
+    Aho-Corasick automaton that scans each line once for all of them.
+    Non-empty ASCII patterns also get a bytes regex used to find candidate
+    lines in memory-mapped files.
+    """
+    
+    def __init__(self, patterns: List[str], case_sensitive: bool, automaton_min_patterns: int):
+        """
+        Compile search patterns
+        
+        Args:
+            patterns: List of search patterns
+            case_sensitive: Whether matching is case sensitive
+            automaton_min_patterns: Fewest patterns for which the Aho-Corasick
+                automaton is used
+        """
+        self.patterns = tuple(patterns)
+        self.case_sensitive = case_sensitive
+        
+        self.literal_patterns: Optional[Tuple[str, ...]] = None
+        if all(pattern.isascii() for pattern in patterns):
+            self.literal_patterns = (
+                self.patterns if case_sensitive else tuple(p.lower() for p in patterns)
+            )
+        
+        self.automaton = None
+        if (AHOCORASICK_AVAILABLE and self.literal_patterns
+                and len(patterns) >= automaton_min_patterns
+                and all(self.literal_patterns)):
+            self.automaton = ahocorasick_rs.AhoCorasick(
+                list(self.literal_patterns), matchkind=ahocorasick_rs.MATCHKIND_STANDARD
+            )
+        
+        flags = 0 if case_sensitive else re.IGNORECASE
+        
+        self.candidate_re: Optional[re.Pattern] = None
+        if self.literal_patterns and all(self.literal_patterns):
+            alternatives = [re.escape(pattern.encode('ascii')) for pattern in patterns]
+            # Lines with non-ASCII bytes are decoded and checked like any other,
+            # since bytes matching would miss their Unicode case folding
+            alternatives.append(rb'[\x80-\xff]')
+            self.candidate_re = re.compile(b'|'.join(alternatives), flags)
+        
+        self.group_to_index = {f"p{i}": i for i in range(len(patterns))}
+        self.pattern_re = re.compile(
+            '|'.join(f"(?P<p{i}>{re.escape(pattern)})" for i, pattern in enumerate(patterns)),
+            flags
+        )
+        self.compiled_patterns = tuple(re.compile(re.escape(pattern), flags) for pattern in patterns)
+    
+    def match_line(self, line: str) -> List[int]:
+        """
+        Find the patterns that occur in a line
+        
+        Args:
+            line: Line of text to search in
+        
+        Returns:
+            Indices of the matching patterns, in the order they were given
+        """
+        # ASCII lines can use substring checks; case folding of other characters
+        # differs between str.lower() and re.IGNORECASE
+        if self.literal_patterns is not None and line.isascii():
+            haystack = line if self.case_sensitive else line.lower()
+            if self.automaton is not None:
+                found = {index for index, _, _ in
+                         self.automaton.find_matches_as_indexes(haystack, overlapping=True)}
+                return sorted(found)
+            return [i for i, needle in enumerate(self.literal_patterns) if needle in haystack]
+        
+        # Single regex pass rejects the (common) lines with no hit
+        hit = self.pattern_re.search(line)
+        if hit is None:
+            return []
+        
+        # The alternation only reports the leftmost hit, so check the
+        # remaining patterns individually on this line
+        first_id = self.group_to_index[hit.lastgroup]
+        return [i for i, pattern_re in enumerate(self.compiled_patterns)
+                if i == first_id or pattern_re.search(line)]
+
 class SearchEngine:
     """Handles file searching and pattern matching"""
     
-    def __init__(self, config: Dict[str, Any]):
+    # Below this many patterns, per-pattern substring checks beat the automaton
+    AHOCORASICK_MIN_PATTERNS = 8
+    # Bumped when the format of persisted matches changes
+    MATCH_CACHE_VERSION = 2
+    
+    def __init__(self, config: Dict[str, Any], file_cache: Optional[FileCache] = None,
+                 match_cache: Optional[SQLiteCache] = None):
         """
         Initialize search engine
         
         Args:
             config: Search configuration dictionary
+            file_cache: Optional cache that receives the content of files with
+                matches, so later processing does not read them again
+            match_cache: Optional persistent cache of per-file matches, keyed on
+                the file's path, mtime and size and on the search patterns
         """
         self.config = config
+        self.file_cache = file_cache
+        self.match_cache = match_cache
         self.case_sensitive = config.get('case_sensitive', False)
         self.max_matches_per_file = config.get('max_matches_per_file', 3)
+        self.max_workers = config.get('max_workers') or os.cpu_count()
+        self.max_file_bytes = config.get('max_file_bytes')
+        self.skip_binary = config.get('skip_binary', True)
+        self.mmap_threshold = config.get('mmap_threshold')
     
     def search_files(self, patterns: List[str], docs_path: str, 
-                    file_patterns: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+                    file_patterns: List[str]) -> Dict[str, MatchBatch]:
         """
         Search for patterns across multiple files
         
@@ -28,7 +159,7 @@ class SearchEngine:
             file_patterns: List of file patterns to match (e.g., ['*.md', '*.txt'])
         
         Returns:
-            Dictionary mapping filenames to list of matches
+            Dictionary mapping filenames to their matches
         """
         if not patterns:
             raise SearchError("No search patterns provided")
@@ -37,23 +168,40 @@ class SearchEngine:
         if not path_obj.exists():
             raise SearchError(f"Documents path does not exist: {docs_path}")
         
+        compiled = self._compile_patterns(patterns)
         all_file_matches = {}
         
         try:
-            # Get all matching files
-            files_to_search = []
-            for pattern in file_patterns:
-                files_to_search.extend(path_obj.rglob(pattern))
+            # Get all matching files in a single walk of the tree
+            filenames = find_files(docs_path, file_patterns)
             
-            if not files_to_search:
+            if not filenames:
                 raise SearchError(f"No files found matching patterns {file_patterns} in {docs_path}")
             
-            # Search each file for all patterns
-            for file_path in files_to_search:
-                if file_path.is_file():
-                    file_matches = self._search_file(patterns, str(file_path))
-                    if file_matches:
-                        all_file_matches[str(file_path)] = file_matches
+            # Files unchanged since an earlier search with the same patterns are
+            # answered from the match cache without being read
+            file_matches_by_name, cache_keys = self._lookup_match_cache(patterns, filenames)
+            filenames_to_scan = [filename for filename in filenames
+                                 if filename not in file_matches_by_name]
+            
+            # Search each file for all patterns. Files are independent, so they
+            # are searched concurrently; map() keeps results in file order.
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                results = executor.map(
+                    lambda filename: self._search_file(compiled, filename), filenames_to_scan
+                )
+                for filename, file_matches in zip(filenames_to_scan, results):
+                    file_matches_by_name[filename] = file_matches
+            
+            if self.match_cache is not None:
+                self.match_cache.set_many(
+                    (cache_keys[filename], file_matches_by_name[filename].to_columns())
+                    for filename in filenames_to_scan
+                )
+            
+            for filename in filenames:
+                if file_matches_by_name[filename]:
+                    all_file_matches[filename] = file_matches_by_name[filename]
             
             return all_file_matches
             
@@ -62,80 +210,309 @@ class SearchEngine:
                 raise
             raise SearchError(f"Error during file search: {e}")
     
-    def _search_file(self, patterns: List[str], filename: str) -> List[Dict[str, Any]]:
+    def _lookup_match_cache(self, patterns: List[str], filenames: List[str]
+                            ) -> Tuple[Dict[str, MatchBatch], Dict[str, str]]:
         """
-        Search for patterns within a specific file
+        Look up previously found matches in the persistent match cache
+        
+        Args:
+            patterns: List of search patterns
+            filenames: Files to look up
+        
+        Returns:
+            Tuple of (cached matches by filename, cache key by filename for misses)
+        """
+        cached_matches: Dict[str, MatchBatch] = {}
+        cache_keys: Dict[str, str] = {}
+        if self.match_cache is None:
+            return cached_matches, cache_keys
+        
+        # Matches depend on the pattern order, case sensitivity, match limit
+        # and which files get skipped
+        search_key = json.dumps([self.MATCH_CACHE_VERSION, patterns, self.case_sensitive,
+                                 self.max_matches_per_file, self.max_file_bytes,
+                                 self.skip_binary])
+        search_hash = hashlib.sha1(search_key.encode('utf-8')).hexdigest()
+        
+        for filename in filenames:
+            stat = os.stat(filename)
+            key = f"{os.path.abspath(filename)}|{stat.st_mtime_ns}|{stat.st_size}|{search_hash}"
+            columns = self.match_cache.get(key)
+            if columns is None:
+                cache_keys[filename] = key
+            else:
+                cached_matches[filename] = MatchBatch.from_columns(patterns, columns)
+        
+        return cached_matches, cache_keys
+    
+    def _compile_patterns(self, patterns: List[str]) -> _CompiledPatterns:
+        """
+        Compile the search patterns for one search_files call
+        
+        The result is passed down to the scanning methods instead of being
+        stored on the engine, so concurrent searches do not share state.
         
         Args:
             patterns: List of search patterns
-            filename: Path to file to search
         
         Returns:
-            List of match dictionaries with line_num, text, and pattern
+            Compiled patterns
+        """
+        return _CompiledPatterns(patterns, self.case_sensitive, self.AHOCORASICK_MIN_PATTERNS)
+    
+    def _search_file(self, compiled: _CompiledPatterns, filename: str) -> MatchBatch:
         """
-        matches = []
+        Search for patterns within a specific file
+        
+        Args:
+            compiled: Compiled search patterns
+            filename: Path to file to search
         
+        Returns:
+            Matches found in the file
+        """
         try:
-            with open(filename, 'r', encoding='utf-8', errors='ignore') as f:
-                for line_num, line in enumerate(f, 1):
-                    for pattern in patterns:
-                        if self._pattern_matches(pattern, line):
-                            matches.append({
-                                'line_num': line_num,
-                                'text': line.rstrip(),
-                                'pattern': pattern
-                            })
-                            
-                            # Limit matches per file
-                            if len(matches) >= self.max_matches_per_file:
-                                return matches
+            cached_file = self.file_cache.get(filename) if self.file_cache is not None else None
+            if cached_file is None:
+                with open(filename, 'rb') as f:
+                    size = os.fstat(f.fileno()).st_size
+                    # Oversized files are skipped before reading
+                    if self.max_file_bytes is not None and size > self.max_file_bytes:
+                        logger.warning("Skipping %s: %d bytes exceeds max_file_bytes (%d)",
+                                       filename, size, self.max_file_bytes)
+                        return MatchBatch(compiled.patterns)
+                    
+                    # Large files are scanned in place, decoding only candidate lines
+                    if (compiled.candidate_re is not None and self.mmap_threshold is not None
+                            and size > self.mmap_threshold):
+                        matches = self._search_mapped_file(compiled, filename, f)
+                        if matches is not None:
+                            return matches
+                    
+                    # Binary files are skipped before decoding
+                    content = read_open_text_file(f, self.skip_binary)
+                
+                if content is None:
+                    logger.warning("Skipping %s: binary file", filename)
+                    return MatchBatch(compiled.patterns)
+                cached_file = CachedFile(content)
+            
+            matches = self._scan_content(compiled, cached_file)
+            
+            if matches and self.file_cache is not None:
+                self.file_cache.put(filename, cached_file)
             
             return matches
             
         except Exception as e:
             raise FileProcessingError(f"Error reading file {filename}: {e}")
     
-    def _pattern_matches(self, pattern: str, text: str) -> bool:
+    def _search_mapped_file(self, compiled: _CompiledPatterns, filename: str,
+                            f: BinaryIO) -> Optional[MatchBatch]:
         """
-        Check if pattern matches text
+        Search a large file through a memory map without decoding all of it
         
         Args:
-            pattern: Search pattern
-            text: Text to search in
+            compiled: Compiled search patterns
+            filename: Path to the file
+            f: The file, opened in binary mode; its position is left unchanged
         
         Returns:
-            True if pattern matches, False otherwise
+            Matches found in the file, or None if the file should be read
+            normally instead (files with '\\r' line endings)
         """
-        try:
-            flags = 0 if self.case_sensitive else re.IGNORECASE
-            return bool(re.search(re.escape(pattern), text, flags))
-        except re.error:
-            # If regex fails, fall back to simple string matching
-            if self.case_sensitive:
-                return pattern in text
-            else:
-                return pattern.lower() in text.lower()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if self.skip_binary and b'\x00' in mapped[:BINARY_PROBE_BYTES]:
+                logger.warning("Skipping %s: binary file", filename)
+                return MatchBatch(compiled.patterns)
+            # Line numbers assume '\n' line endings
+            if mapped.find(b'\r') != -1:
+                return None
+            return self._scan_mapped_lines(compiled, mapped)
     
-    def filter_unique_matches(self, matches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _scan_mapped_lines(self, compiled: _CompiledPatterns, mapped: mmap.mmap) -> MatchBatch:
+        """
+        Search for patterns in the lines of a memory-mapped file
+        
+        The candidate regex runs over the raw bytes; only the lines it hits
+        are decoded and matched like in _scan_lines, so the results are the
+        same as for a normally read file.
+        
+        Args:
+            compiled: Compiled search patterns
+            mapped: Memory map of the file
+        
+        Returns:
+            Matches found in the file
+        """
+        matches = MatchBatch(compiled.patterns)
+        line_num = 1
+        counted_to = 0
+        pos = 0
+        
+        while True:
+            hit = compiled.candidate_re.search(mapped, pos)
+            if hit is None:
+                return matches
+            
+            line_start = mapped.rfind(b'\n', 0, hit.start()) + 1
+            line_end = mapped.find(b'\n', hit.start())
+            if line_end == -1:
+                line_end = len(mapped)
+            
+            line_num += mapped[counted_to:line_start].count(b'\n')
+            counted_to = line_start
+            
+            line = mapped[line_start:line_end].decode('utf-8', errors='ignore')
+            for pattern_id in compiled.match_line(line):
+                matches.append(line_num, line.rstrip(), pattern_id)
+                
+                # Limit matches per file
+                if len(matches) >= self.max_matches_per_file:
+                    return matches
+            
+            pos = line_end + 1
+    
+    def _scan_content(self, compiled: _CompiledPatterns, cached_file: CachedFile) -> MatchBatch:
+        """
+        Search for patterns in a file's content
+        
+        ASCII content searched for literal patterns is scanned as a whole with
+        str.find, so only lines containing a pattern are visited in Python.
+        Anything else is scanned line by line.
+        
+        Args:
+            compiled: Compiled search patterns
+            cached_file: File to search
+        
+        Returns:
+            Matches found in the file
+        """
+        content = cached_file.content
+        if compiled.literal_patterns is None or not content.isascii():
+            return self._scan_lines(compiled, cached_file.lines)
+        
+        matches = MatchBatch(compiled.patterns)
+        if not content:
+            return matches
+        
+        # A trailing newline does not start another line
+        end = len(content) - 1 if content.endswith('\n') else len(content)
+        haystack = content if self.case_sensitive else content.lower()
+        line_num = 1
+        counted_to = 0
+        
+        for line_start, line_end in self._candidate_lines(haystack, compiled.literal_patterns, end):
+            line_num += content.count('\n', counted_to, line_start)
+            counted_to = line_start
+            
+            line = content[line_start:line_end]
+            for pattern_id in compiled.match_line(line):
+                matches.append(line_num, line.rstrip(), pattern_id)
+                
+                # Limit matches per file
+                if len(matches) >= self.max_matches_per_file:
+                    return matches
+        
+        return matches
+    
+    @staticmethod
+    def _candidate_lines(haystack: str, needles: List[str], end: int) -> Iterator[Tuple[int, int]]:
+        """
+        Find the lines that contain any of the needles
+        
+        Each needle's next occurrence is located with str.find and only
+        searched for again once the scan has moved past it.
+        
+        Args:
+            haystack: Text to search
+            needles: Substrings to look for
+            end: Offset where the search stops
+        
+        Yields:
+            (start, end) offsets of each candidate line, in order
+        """
+        next_hits = [haystack.find(needle, 0, end) for needle in needles]
+        
+        while True:
+            pending = [hit for hit in next_hits if hit != -1]
+            if not pending:
+                return
+            
+            hit = min(pending)
+            line_start = haystack.rfind('\n', 0, hit) + 1
+            line_end = haystack.find('\n', hit, end)
+            if line_end == -1:
+                line_end = end
+            yield line_start, line_end
+            
+            pos = line_end + 1
+            next_hits = [
+                haystack.find(needle, pos, end) if hit != -1 and hit < pos else hit
+                for hit, needle in zip(next_hits, needles)
+            ]
+    
+    def _scan_lines(self, compiled: _CompiledPatterns, lines: List[str]) -> MatchBatch:
+        """
+        Search for patterns in the lines of a file
+        
+        Args:
+            compiled: Compiled search patterns
+            lines: File content split on newlines
+        
+        Returns:
+            Matches found in the file
+        """
+        matches = MatchBatch(compiled.patterns)
+        # A trailing newline does not start another line
+        line_count = len(lines) - 1 if not lines[-1] else len(lines)
+        
+        for line_num, line in enumerate(islice(lines, line_count), 1):
+            for pattern_id in compiled.match_line(line):
+                matches.append(line_num, line.rstrip(), pattern_id)
+                
+                # Limit matches per file
+                if len(matches) >= self.max_matches_per_file:
+                    return matches
+        
+        return matches
+    
+    def filter_unique_matches(self, matches: MatchBatch) -> MatchBatch:
         """
         Filter out duplicate matches based on text content
         
         Args:
-            matches: List of match dictionaries
+            matches: Matches found in a file
         
         Returns:
-            List of unique matches, limited by max_matches_per_file
+            Unique matches, limited by max_matches_per_file
         """
-        seen_texts = set()
-        unique_matches = []
+        seen_keys = set()
+        unique_indices = []
         
-        for match in matches:
-            text_key = match['text'].strip().lower()
-            if text_key not in seen_texts:
-                seen_texts.add(text_key)
-                unique_matches.append(match)
+        for i, text in enumerate(matches.texts):
+            text_key = self._text_key(text)
+            if text_key not in seen_keys:
+                seen_keys.add(text_key)
+                unique_indices.append(i)
                 
-                if len(unique_matches) >= self.max_matches_per_file:
+                if len(unique_indices) >= self.max_matches_per_file:
                     break
         
-        return unique_matches
+        return matches.select(unique_indices)
+    
+    @staticmethod
+    def _text_key(text: str) -> int:
+        """
+        Hash match text for duplicate detection, ignoring case and surrounding whitespace
+        
+        Args:
+            text: Match text
+        
+        Returns:
+            64-bit hash of the normalized text
+        """
+        data = text.strip().casefold().encode('utf-8', 'surrogatepass')
+        if XXHASH_AVAILABLE:
+            return xxhash.xxh3_64_intdigest(data)
+        return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
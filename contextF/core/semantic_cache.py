@@ -0,0 +1,160 @@
+import json
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, List, Optional
+from ..exceptions import ConfigurationError
+
+if TYPE_CHECKING:
+    import numpy
+
+logger = logging.getLogger(__name__)
+
+class SemanticCache:
+    """
+    Cache that answers lookups for queries similar in meaning to a stored one
+    
+    Entries are kept in memory, and also saved under cache_dir when one is
+    given, so they are reused by later runs. The files are named after the
+    embedding model, since vectors from different models are not comparable.
+    Errors reading or writing the files are logged and the cache continues in
+    memory.
+    """
+    
+    # Default number of entries kept; the oldest are dropped first
+    MAX_ENTRIES = 100000
+    
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", threshold: float = 0.92,
+                 cache_dir: Optional[str] = None, max_entries: Optional[int] = None):
+        """
+        Initialize semantic cache
+        
+        Args:
+            model_name: sentence-transformers model used to embed queries
+            threshold: Minimum cosine similarity for a lookup to count as a hit
+            cache_dir: Directory to persist entries in (default: memory only)
+            max_entries: Number of entries kept (default: MAX_ENTRIES)
+        
+        Raises:
+            ConfigurationError: If the optional dependencies are missing or the
+                model cannot be loaded
+        """
+        # Imported here so they are only loaded when the cache is enabled
+        try:
+            import faiss
+            import numpy
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ConfigurationError(
+                "sentence-transformers and faiss-cpu are required for the semantic cache. "
+                "Install with: pip install contextF[semantic]"
+            )
+        
+        try:
+            self.model = SentenceTransformer(model_name)
+        except Exception as e:
+            raise ConfigurationError(f"Failed to load embedding model '{model_name}': {e}")
+        
+        self._faiss = faiss
+        self._numpy = numpy
+        self.threshold = threshold
+        self.max_entries = max_entries or self.MAX_ENTRIES
+        # Embeddings are normalized, so inner product is cosine similarity
+        self.index = faiss.IndexFlatIP(self.model.get_sentence_embedding_dimension())
+        self.values: List[Any] = []
+        self._lock = threading.Lock()
+        
+        self._index_path: Optional[Path] = None
+        self._values_path: Optional[Path] = None
+        if cache_dir is not None:
+            stem = "semantic-" + re.sub(r'[^A-Za-z0-9_.-]', '_', model_name)
+            cache_path = Path(cache_dir).expanduser()
+            self._index_path = cache_path / (stem + ".faiss")
+            self._values_path = cache_path / (stem + ".json")
+            self._load()
+    
+    def _load(self):
+        """Load entries saved by an earlier run, if any"""
+        if not (self._index_path.exists() and self._values_path.exists()):
+            return
+        try:
+            index = self._faiss.read_index(str(self._index_path))
+            with open(self._values_path, 'r', encoding='utf-8') as f:
+                values = json.load(f)
+        except (OSError, RuntimeError, ValueError) as e:
+            logger.warning("Failed to load semantic cache from %s: %s", self._index_path, e)
+            return
+        
+        # The two files are written separately, so a crash between the writes
+        # can leave them out of step
+        if index.d != self.index.d or index.ntotal != len(values):
+            logger.warning("Ignoring semantic cache in %s: it is incomplete or from another model",
+                           self._index_path)
+            return
+        self.index = index
+        self.values = values
+    
+    def _save(self):
+        """Write the entries to cache_dir (called with the lock held)"""
+        try:
+            self._index_path.parent.mkdir(parents=True, exist_ok=True)
+            # Written under temporary names and renamed, so readers never see
+            # a partial file
+            partial_index = self._index_path.with_name(self._index_path.name + '.part')
+            partial_values = self._values_path.with_name(self._values_path.name + '.part')
+            self._faiss.write_index(self.index, str(partial_index))
+            with open(partial_values, 'w', encoding='utf-8') as f:
+                json.dump(self.values, f)
+            os.replace(partial_index, self._index_path)
+            os.replace(partial_values, self._values_path)
+        except (OSError, RuntimeError, TypeError, ValueError) as e:
+            logger.warning("Failed to save semantic cache to %s: %s", self._index_path, e)
+    
+    def _embed(self, text: str) -> "numpy.ndarray":
+        """Embed normalized text as a (1, dim) float32 array"""
+        normalized = ' '.join(text.lower().split())
+        embedding = self.model.encode([normalized], normalize_embeddings=True)
+        return embedding.astype('float32', copy=False)
+    
+    def get(self, text: str) -> Optional[Any]:
+        """
+        Look up the value stored for the most similar text
+        
+        Args:
+            text: Text to look up
+        
+        Returns:
+            Stored value if its text is at least `threshold` similar, None otherwise
+        """
+        embedding = self._embed(text)
+        with self._lock:
+            if self.index.ntotal == 0:
+                return None
+            scores, ids = self.index.search(embedding, 1)
+        
+        if scores[0, 0] >= self.threshold:
+            return self.values[ids[0, 0]]
+        return None
+    
+    def add(self, text: str, value: Any):
+        """
+        Store a value for text
+        
+        Args:
+            text: Text to store the value under
+            value: Value to return for similar lookups
+        """
+        embedding = self._embed(text)
+        with self._lock:
+            self.index.add(embedding)
+            self.values.append(value)
+            excess = self.index.ntotal - self.max_entries
+            if excess > 0:
+                # Ids of a flat index are positions, so removing the first
+                # entries keeps the rest aligned with values
+                self.index.remove_ids(self._numpy.arange(excess, dtype='int64'))
+                del self.values[:excess]
+            if self._index_path is not None:
+                self._save()
@@ -1,99 +1,178 @@
-import tiktoken
-from typing import List, Dict, Any, Tuple
+import functools
+import hashlib
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple, Union
+from .files import CachedFile, FileCache, read_text_file
+from .matches import MatchBatch
 from ..exceptions import TokenLimitError, FileProcessingError
 
-try:
-    from langchain_text_splitters import RecursiveCharacterTextSplitter
-    LANGCHAIN_AVAILABLE = True
-except ImportError:
-    LANGCHAIN_AVAILABLE = False
-    # Simple fallback text splitter
-    class RecursiveCharacterTextSplitter:
-        def __init__(self, chunk_size=1000, chunk_overlap=200, length_function=None):
-            self.chunk_size = chunk_size
-            self.chunk_overlap = chunk_overlap
-            self.length_function = length_function or len
+@functools.lru_cache(maxsize=8)
+def get_encoding(encoding_name: str):
+    """
+    Get a tiktoken encoding, shared by every TextProcessor in the process
+    
+    tiktoken is imported here as it is slow to load.
+    
+    Args:
+        encoding_name: Name of the tiktoken encoding (e.g. 'cl100k_base')
+    
+    Returns:
+        tiktoken Encoding
+    """
+    import tiktoken
+    return tiktoken.get_encoding(encoding_name)
+
+# Simple fallback text splitter, used when langchain-text-splitters is missing
+class _SimpleTextSplitter:
+    def __init__(self, chunk_size=1000, chunk_overlap=200, length_function=None):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.length_function = length_function or len
 
 class TextProcessor:
     """Handles text processing, tokenization, and context windowing"""
     
-    def __init__(self, config: Dict[str, Any]):
+    # Number of token counts remembered by count_tokens
+    TOKEN_CACHE_SIZE = 1024
+    # Texts longer than this are cached under a digest instead of the text itself
+    TOKEN_CACHE_KEY_CHARS = 256
+    
+    def __init__(self, config: Dict[str, Any], file_cache: Optional[FileCache] = None):
         """
         Initialize text processor
         
         Args:
             config: Configuration dictionary containing token and text processing settings
+            file_cache: Optional cache of file contents shared with the search engine
         """
         self.token_config = config['tokens']
         self.text_config = config['text_processing']
         
-        # Initialize tokenizer
+        # Initialize tokenizer; the encoding is loaded once per process
         encoding_name = self.token_config.get('encoding', 'cl100k_base')
         try:
-            self.tokenizer = tiktoken.get_encoding(encoding_name)
+            self.tokenizer = get_encoding(encoding_name)
         except Exception as e:
             raise FileProcessingError(f"Failed to initialize tokenizer with encoding '{encoding_name}': {e}")
         
-        # Initialize text splitter
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.text_config.get('chunk_size', 1000),
-            chunk_overlap=self.text_config.get('chunk_overlap', 200),
-            length_function=self.count_tokens
-        )
+        # Text splitter is created on first use
+        self._text_splitter = None
         
         # Configuration values
         self.context_window_tokens = self.token_config['context_window_tokens']
         self.max_context_tokens = self.token_config['max_context_tokens']
         self.max_file_tokens = self.token_config['max_file_tokens']
         self.merge_overlapping = self.text_config.get('merge_overlapping_windows', True)
+        self.file_cache = file_cache
+        
+        # LRU cache of token counts, keyed by _token_cache_key
+        self._token_cache: "OrderedDict[Union[str, Tuple[int, bytes]], int]" = OrderedDict()
+    
+    @property
+    def text_splitter(self):
+        """Token-aware text splitter (langchain's when installed)"""
+        if self._text_splitter is None:
+            try:
+                from langchain_text_splitters import RecursiveCharacterTextSplitter
+            except ImportError:
+                RecursiveCharacterTextSplitter = _SimpleTextSplitter
+            
+            self._text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=self.text_config.get('chunk_size', 1000),
+                chunk_overlap=self.text_config.get('chunk_overlap', 200),
+                length_function=self.count_tokens
+            )
+        return self._text_splitter
     
     def count_tokens(self, text: str) -> int:
         """
         Count tokens in text using tiktoken
         
+        Results are cached, so counting the same text again (e.g. the same file
+        across several build_context calls) does not re-encode it.
+        
         Args:
             text: Text to count tokens for
         
         Returns:
             Number of tokens
         """
+        key = self._token_cache_key(text)
+        cached = self._token_cache.get(key)
+        if cached is not None:
+            self._token_cache.move_to_end(key)
+            return cached
+        
+        try:
+            token_count = len(self.tokenizer.encode_ordinary(text))
+        except Exception as e:
+            raise FileProcessingError(f"Error counting tokens: {e}")
+        
+        self._token_cache[key] = token_count
+        if len(self._token_cache) > self.TOKEN_CACHE_SIZE:
+            self._token_cache.popitem(last=False)
+        return token_count
+    
+    def _token_cache_key(self, text: str) -> Union[str, Tuple[int, bytes]]:
+        """Build the token cache key for text without holding on to large strings"""
+        if len(text) <= self.TOKEN_CACHE_KEY_CHARS:
+            return text
+        digest = hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+        return (len(text), digest)
+    
+    def count_tokens_batch(self, texts: List[str]) -> List[int]:
+        """
+        Count tokens for several texts in a single tokenizer call
+        
+        Args:
+            texts: Texts to count tokens for
+        
+        Returns:
+            Number of tokens for each text, in input order
+        """
+        if not texts:
+            return []
+        
         try:
-            return len(self.tokenizer.encode(text))
+            return [len(tokens) for tokens in self.tokenizer.encode_ordinary_batch(texts)]
         except Exception as e:
             raise FileProcessingError(f"Error counting tokens: {e}")
     
-    def extract_context_window(self, text: str, line_num: int) -> Tuple[str, int, int]:
+    def line_token_offsets(self, lines: List[str]) -> List[int]:
+        """
+        Compute cumulative token offsets of lines
+        
+        Args:
+            lines: File content split into lines
+        
+        Returns:
+            List where entry i is the number of tokens in lines[:i]
+            (one entry longer than lines)
+        """
+        # Each line also costs about one token for its newline
+        line_tokens = (count + 1 for count in self.count_tokens_batch(lines))
+        return list(accumulate(line_tokens, initial=0))
+    
+    def extract_context_window(self, lines: List[str], line_offsets: List[int],
+                               line_num: int) -> Tuple[str, int, int]:
         """
         Extract context window around a specific line
         
+        The window holds up to context_window_tokens tokens on each side of
+        the line, found by bisecting the cumulative token offsets.
+        
         Args:
-            text: Full text content
+            lines: File content split into lines
+            line_offsets: Cumulative token offsets from line_token_offsets
             line_num: Line number to center the window around
         
         Returns:
             Tuple of (context_text, start_line, end_line)
         """
         try:
-            lines = text.split('\n')
-            total_lines = len(lines)
-            
-            if line_num > total_lines:
-                line_num = total_lines
-            
-            # Estimate tokens per line
-            total_tokens = self.count_tokens(text)
-            tokens_per_line_approx = total_tokens / total_lines if total_lines > 0 else 0
-            
-            # Calculate lines needed for context window
-            if tokens_per_line_approx > 0:
-                lines_for_window = int(self.context_window_tokens / tokens_per_line_approx)
-            else:
-                lines_for_window = 50  # Default fallback
-            
-            # Calculate window boundaries
-            start_line = max(0, line_num - lines_for_window - 1)
-            end_line = min(total_lines, line_num + lines_for_window)
-            
+            start_line, end_line = self._context_window_bounds(line_offsets, line_num)
             context_text = '\n'.join(lines[start_line:end_line])
             
             return context_text, start_line, end_line
@@ -101,12 +180,41 @@ class TextProcessor:
         except Exception as e:
             raise FileProcessingError(f"Error extracting context window: {e}")
     
-    def merge_overlapping_windows(self, windows: List[Dict[str, Any]]) -> str:
+    def _context_window_bounds(self, line_offsets: List[int], line_num: int) -> Tuple[int, int]:
+        """
+        Find the line range of the context window around a specific line
+        
+        Args:
+            line_offsets: Cumulative token offsets from line_token_offsets
+            line_num: Line number to center the window around
+        
+        Returns:
+            Tuple of (start_line, end_line) as a slice into the lines
+        """
+        total_lines = len(line_offsets) - 1
+        
+        if line_num > total_lines:
+            line_num = total_lines
+        line_index = max(line_num - 1, 0)
+        
+        # Earliest start and latest end whose lines before/after the match
+        # fit in the token budget
+        start_line = bisect_left(
+            line_offsets, line_offsets[line_index] - self.context_window_tokens
+        )
+        end_line = bisect_right(
+            line_offsets, line_offsets[line_index + 1] + self.context_window_tokens
+        ) - 1
+        
+        return start_line, end_line
+    
+    def merge_overlapping_windows(self, windows: List[Tuple[int, int]], lines: List[str]) -> str:
         """
         Merge overlapping context windows
         
         Args:
-            windows: List of window dictionaries with 'text', 'start_line', 'end_line'
+            windows: List of (start_line, end_line) line ranges
+            lines: File content split into lines
         
         Returns:
             Merged context text
@@ -115,48 +223,44 @@ class TextProcessor:
             return ""
         
         try:
-            # Sort windows by start line
-            sorted_windows = sorted(windows, key=lambda x: x['start_line'])
-            merged = [sorted_windows[0]]
-            
-            for current in sorted_windows[1:]:
-                last = merged[-1]
-                
-                # Check for overlap
-                if current['start_line'] <= last['end_line']:
-                    # Merge overlapping windows
-                    last['end_line'] = max(last['end_line'], current['end_line'])
-                    # Combine text (avoiding duplication)
-                    if current['text'] not in last['text']:
-                        last['text'] = last['text'] + '\n' + current['text']
+            # Sort windows by start line and sweep, extending the last range
+            # while the next one overlaps it
+            merged: List[List[int]] = []
+            for start_line, end_line in sorted(windows):
+                if merged and start_line <= merged[-1][1]:
+                    merged[-1][1] = max(merged[-1][1], end_line)
                 else:
-                    # No overlap, add as separate window
-                    merged.append(current)
+                    merged.append([start_line, end_line])
             
-            return '\n\n'.join([w['text'] for w in merged])
+            return '\n\n'.join('\n'.join(lines[start:end]) for start, end in merged)
             
         except Exception as e:
             raise FileProcessingError(f"Error merging context windows: {e}")
     
-    def process_file_content(self, filename: str, matches: List[Dict[str, Any]]) -> Tuple[str, int]:
+    def process_file_content(self, filename: str, matches: MatchBatch) -> Tuple[str, int]:
         """
         Process file content and extract relevant context
         
         Args:
             filename: Path to file
-            matches: List of match dictionaries
+            matches: Matches found in the file
         
         Returns:
             Tuple of (context_text, token_count)
         """
         try:
-            with open(filename, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
+            if self.file_cache is not None:
+                cached_file = self.file_cache.load(filename)
+            else:
+                cached_file = CachedFile(read_text_file(filename))
+            content = cached_file.content
             
             if not content.strip():
                 return "", 0
             
-            file_tokens = self.count_tokens(content)
+            if cached_file.token_count is None:
+                cached_file.token_count = self.count_tokens(content)
+            file_tokens = cached_file.token_count
             
             # If file is small enough, return entire content
             if file_tokens <= self.max_file_tokens:
@@ -166,26 +270,21 @@ class TextProcessor:
             if not matches:
                 return "", 0
             
-            windows = []
-            for match in matches:
-                window_text, start_line, end_line = self.extract_context_window(
-                    content, match['line_num']
-                )
-                windows.append({
-                    'text': window_text,
-                    'start_line': start_line,
-                    'end_line': end_line
-                })
+            # Tokenize the lines once for all matches
+            lines = cached_file.lines
+            line_offsets = self.line_token_offsets(lines)
+            
+            windows = [self._context_window_bounds(line_offsets, line_num)
+                       for line_num in matches.line_nums]
             
             # Merge overlapping windows if configured
             if self.merge_overlapping:
-                merged_context = self.merge_overlapping_windows(windows)
+                merged_context = self.merge_overlapping_windows(windows, lines)
             else:
-                merged_context = '\n\n'.join([w['text'] for w in windows])
-            
-            context_tokens = self.count_tokens(merged_context)
+                merged_context = '\n\n'.join('\n'.join(lines[start:end]) for start, end in windows)
             
-            return merged_context, context_tokens
+            # Counted on the joined text, since tokens can span window boundaries
+            return merged_context, self.count_tokens(merged_context)
             
         except Exception as e:
             raise FileProcessingError(f"Error processing file {filename}: {e}")
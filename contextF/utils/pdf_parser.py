@@ -1,22 +1,140 @@
+import atexit
+import importlib.util
+import logging
+import os
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import Optional, List
+from typing import IO, Iterable, Iterator, Optional, List, Tuple
 from ..exceptions import FileProcessingError
 
-try:
-    import pymupdf4llm
-    PYMUPDF_AVAILABLE = True
-except ImportError:
-    PYMUPDF_AVAILABLE = False
+# Backends are slow to import, so they are only looked up here and imported
+# by the PDFParser that uses them
+PYMUPDF_AVAILABLE = importlib.util.find_spec("pymupdf4llm") is not None
+PYPDFIUM_AVAILABLE = importlib.util.find_spec("pypdfium2") is not None
+
+# No handler is added here: applications decide where per-file progress goes
+# (e.g. logging.basicConfig(level=logging.INFO)); by default INFO is dropped
+logger = logging.getLogger(__name__)
+
+# Worker pool shared by convert_pdfs_to_markdown calls, keyed by (backend, workers)
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_key: Optional[Tuple[str, int]] = None
+_pool_lock = threading.Lock()
+
+def _worker_init(backend: str):
+    """Import the conversion backend once when a worker process starts"""
+    PDFParser(backend)
+
+def _get_pool(backend: str, workers: int) -> ProcessPoolExecutor:
+    """
+    Get the shared worker pool, creating it on first use
+    
+    Worker processes are kept alive between calls so repeated batch conversions
+    do not pay for process startup and backend imports again. A pool with a
+    different backend or size replaces the previous one.
+    
+    Args:
+        backend: PDF backend the workers convert with
+        workers: Number of worker processes
+    
+    Returns:
+        Process pool
+    """
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is None or _pool_key != (backend, workers):
+            if _pool is None:
+                atexit.register(_shutdown_pool)
+            else:
+                _pool.shutdown()
+            _pool = ProcessPoolExecutor(max_workers=workers, initializer=_worker_init,
+                                        initargs=(backend,))
+            _pool_key = (backend, workers)
+        return _pool
+
+def _shutdown_pool():
+    """Shut down the shared worker pool, if any"""
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+            _pool_key = None
+
+def _convert_one(args: Tuple[str, str, str]) -> Tuple[str, Optional[str], Optional[str]]:
+    """
+    Convert one PDF to a markdown file in a worker process
+    
+    Module-level so it can be pickled for multiprocessing; each worker opens
+    its own document.
+    
+    Args:
+        args: Tuple of (pdf_path, output_dir, backend)
+    
+    Returns:
+        Tuple of (pdf_path, output file path or None, error message or None)
+    """
+    pdf_path, output_dir, backend = args
+    output_file = Path(output_dir) / f"{Path(pdf_path).stem}.md"
+    try:
+        PDFParser(backend).stream_pdf_to_markdown(pdf_path, str(output_file))
+        return pdf_path, str(output_file), None
+    except Exception as e:
+        return pdf_path, None, str(e)
 
 class PDFParser:
     """Utility class for converting PDF files to markdown"""
     
-    def __init__(self):
-        """Initialize PDF parser"""
-        if not PYMUPDF_AVAILABLE:
+    BACKENDS = ("pymupdf", "pdfium")
+    # Lines whose font is this much larger than the body text become headings
+    HEADING_SCALE = 1.15
+    TITLE_SCALE = 1.5
+    # Longer lines are never treated as headings
+    MAX_HEADING_CHARS = 120
+    # Write buffer size used when streaming markdown to a file
+    WRITE_BUFFER_BYTES = 1 << 20
+    
+    def __init__(self, backend: str = "pymupdf"):
+        """
+        Initialize PDF parser
+        
+        Args:
+            backend: "pymupdf" to convert with pymupdf4llm, or "pdfium" for faster
+                plain text extraction with pypdfium2 and font-size based headings
+        
+        Raises:
+            FileProcessingError: If the backend is unknown or its package is missing
+        """
+        if backend not in self.BACKENDS:
+            raise FileProcessingError(
+                f"Unknown PDF backend '{backend}', expected one of {', '.join(self.BACKENDS)}"
+            )
+        if backend == "pymupdf" and not PYMUPDF_AVAILABLE:
             raise FileProcessingError(
                 "pymupdf4llm is required for PDF parsing. Install with: pip install pymupdf4llm"
             )
+        if backend == "pdfium" and not PYPDFIUM_AVAILABLE:
+            raise FileProcessingError(
+                "pypdfium2 is required for the pdfium backend. Install with: pip install pypdfium2"
+            )
+        self.backend = backend
+        
+        try:
+            if backend == "pdfium":
+                import pypdfium2
+                import pypdfium2.raw
+                self._pdfium = pypdfium2
+                self._pdfium_c = pypdfium2.raw
+            else:
+                import pymupdf
+                import pymupdf4llm
+                self._pymupdf = pymupdf
+                self._pymupdf4llm = pymupdf4llm
+        except ImportError as e:
+            raise FileProcessingError(f"Failed to load PDF backend '{backend}': {e}") from e
     
     def convert_pdf_to_markdown(self, pdf_path: str, output_path: Optional[str] = None) -> str:
         """
@@ -33,15 +151,13 @@ class PDFParser:
             FileProcessingError: If conversion fails
         """
         try:
-            pdf_file = Path(pdf_path)
-            if not pdf_file.exists():
-                raise FileProcessingError(f"PDF file not found: {pdf_path}")
-            
-            if not pdf_file.suffix.lower() == '.pdf':
-                raise FileProcessingError(f"File is not a PDF: {pdf_path}")
+            pdf_file = self._check_pdf_path(pdf_path)
             
             # Convert PDF to markdown
-            markdown_content = pymupdf4llm.to_markdown(str(pdf_file))
+            if self.backend == "pdfium":
+                markdown_content = self._pdfium_to_markdown(str(pdf_file))
+            else:
+                markdown_content = self._pymupdf4llm.to_markdown(str(pdf_file))
             
             # Save to file if output path provided
             if output_path:
@@ -53,22 +169,97 @@ class PDFParser:
             
             return markdown_content
             
+        except FileProcessingError:
+            raise
         except Exception as e:
-            if isinstance(e, FileProcessingError):
+            raise FileProcessingError(f"Error converting PDF {pdf_path}: {e}") from e
+    
+    def stream_pdf_to_markdown(self, pdf_path: str, output_path: str) -> str:
+        """
+        Convert a single PDF file to a markdown file, one page at a time
+        
+        Only one page's markdown is held in memory, so this suits very large
+        documents better than convert_pdf_to_markdown.
+        
+        Args:
+            pdf_path: Path to PDF file
+            output_path: Output path for markdown file
+        
+        Returns:
+            Path of the written markdown file
+        
+        Raises:
+            FileProcessingError: If conversion fails
+        """
+        try:
+            pdf_file = self._check_pdf_path(pdf_path)
+            
+            output_file = Path(output_path)
+            output_file.parent.mkdir(parents=True, exist_ok=True)
+            
+            # Written under a temporary name so a failed conversion leaves no
+            # partial markdown file behind
+            partial_file = output_file.with_name(output_file.name + '.part')
+            try:
+                with open(partial_file, 'w', encoding='utf-8',
+                          buffering=self.WRITE_BUFFER_BYTES) as f:
+                    if self.backend == "pdfium":
+                        self._pdfium_write_markdown(str(pdf_file), f)
+                    else:
+                        self._pymupdf_write_markdown(str(pdf_file), f)
+                os.replace(partial_file, output_file)
+            except BaseException:
+                partial_file.unlink(missing_ok=True)
                 raise
-            raise FileProcessingError(f"Error converting PDF {pdf_path}: {e}")
+            
+            return str(output_file)
+            
+        except FileProcessingError:
+            raise
+        except Exception as e:
+            raise FileProcessingError(f"Error converting PDF {pdf_path}: {e}") from e
+    
+    @staticmethod
+    def _check_pdf_path(pdf_path: str) -> Path:
+        """
+        Check that a path points to an existing PDF file
+        
+        Args:
+            pdf_path: Path to PDF file
+        
+        Returns:
+            Path object for the file
+        
+        Raises:
+            FileProcessingError: If the file is missing or not a PDF
+        """
+        pdf_file = Path(pdf_path)
+        if not pdf_file.exists():
+            raise FileProcessingError(f"PDF file not found: {pdf_path}")
+        
+        if not pdf_file.suffix.lower() == '.pdf':
+            raise FileProcessingError(f"File is not a PDF: {pdf_path}")
+        
+        return pdf_file
     
     def convert_pdfs_to_markdown(self, 
                                 input_folder: str, 
                                 output_folder: str,
-                                file_pattern: str = "*.pdf") -> List[str]:
+                                file_pattern: str = "*.pdf",
+                                max_workers: Optional[int] = None) -> List[str]:
         """
         Convert all PDF files in a folder to markdown files
         
+        Files are converted in parallel worker processes; neither MuPDF nor
+        PDFium can convert several documents concurrently within a process.
+        The workers are reused by later calls with the same backend and
+        max_workers, and shut down at interpreter exit.
+        
         Args:
             input_folder: Path to folder containing PDF files
             output_folder: Path to folder where markdown files will be saved
             file_pattern: Pattern to match PDF files (default: "*.pdf")
+            max_workers: Number of worker processes (default: CPU count)
         
         Returns:
             List of successfully converted file paths
@@ -97,46 +288,243 @@ class PDFParser:
             
             print(f"Found {len(pdf_files)} PDF file(s). Starting conversion...")
             
-            for pdf_file in pdf_files:
+            # Pooled workers keep the working directory they were started in,
+            # so they are given absolute paths
+            tasks = [(str(pdf_file.resolve()), str(output_path.resolve()), self.backend)
+                     for pdf_file in pdf_files]
+            workers = max_workers or os.cpu_count() or 1
+            
+            # A single file is converted in this process, skipping the pool
+            if workers <= 1 or len(tasks) == 1:
+                results = map(_convert_one, tasks)
+                self._collect_results(results, converted_files, errors, output_path)
+            else:
                 try:
-                    print(f"Converting: {pdf_file.name}")
-                    
-                    # Convert to markdown
-                    markdown_content = self.convert_pdf_to_markdown(str(pdf_file))
-                    
-                    # Save markdown file
-                    output_file = output_path / f"{pdf_file.stem}.md"
-                    with open(output_file, 'w', encoding='utf-8') as f:
-                        f.write(markdown_content)
-                    
-                    converted_files.append(str(output_file))
-                    print(f"  -> Saved to: {output_file}")
-                    
-                except Exception as e:
-                    error_msg = f"Error converting {pdf_file.name}: {e}"
-                    errors.append(error_msg)
-                    print(f"  -> {error_msg}")
-            
-            print(f"\nConversion complete. {len(converted_files)} files converted successfully.")
+                    results = _get_pool(self.backend, workers).map(_convert_one, tasks)
+                    self._collect_results(results, converted_files, errors, output_path)
+                except BrokenProcessPool:
+                    # A worker died; the next call starts a fresh pool
+                    _shutdown_pool()
+                    raise
             
+            # Summary is printed in one write rather than per file
+            summary = [f"\nConversion complete. {len(converted_files)} files converted successfully."]
             if errors:
-                print(f"Errors encountered:")
-                for error in errors:
-                    print(f"  - {error}")
+                summary.append("Errors encountered:")
+                summary.extend(f"  - {error}" for error in errors)
+            print('\n'.join(summary))
             
             return converted_files
             
+        except FileProcessingError:
+            raise
         except Exception as e:
-            if isinstance(e, FileProcessingError):
-                raise
-            raise FileProcessingError(f"Error during batch PDF conversion: {e}")
+            raise FileProcessingError(f"Error during batch PDF conversion: {e}") from e
+    
+    def _pymupdf_write_markdown(self, pdf_path: str, f: IO[str]):
+        """
+        Write the markdown of a PDF converted with pymupdf4llm, page by page
+        
+        When pymupdf4llm exports IdentifyHeaders, heading sizes are identified
+        once for the whole document and pages are converted one at a time, as
+        pymupdf4llm.to_markdown does for a full conversion. Otherwise it uses
+        the pymupdf layout engine, which ranks headings across the whole
+        document, so the pages are converted together and written one by one.
+        Versions whose to_markdown takes neither hdr_info nor page_chunks are
+        converted with a single to_markdown(pdf_path) call instead.
+        
+        Args:
+            pdf_path: Path to PDF file
+            f: Text file to write to
+        """
+        doc = self._pymupdf.open(pdf_path)
+        try:
+            written = False
+            try:
+                for text in self._pymupdf_pages(doc):
+                    f.write(text)
+                    written = True
+            except TypeError:
+                # Unsupported keyword arguments, or page_chunks ignored and a
+                # single string returned; nothing has been written yet then
+                if written:
+                    raise
+                f.write(self._pymupdf4llm.to_markdown(pdf_path))
+        finally:
+            doc.close()
+    
+    def _pymupdf_pages(self, doc) -> Iterator[str]:
+        """
+        Convert an open PDF with pymupdf4llm one page at a time
+        
+        Args:
+            doc: Open pymupdf document
+        
+        Returns:
+            Iterator over the markdown of each page
+        """
+        identify_headers = getattr(self._pymupdf4llm, 'IdentifyHeaders', None)
+        if identify_headers is None:
+            for page in self._pymupdf4llm.to_markdown(doc, page_chunks=True):
+                yield page['text']
+        else:
+            hdr_info = identify_headers(doc)
+            for page_index in range(doc.page_count):
+                yield self._pymupdf4llm.to_markdown(doc, pages=[page_index], hdr_info=hdr_info)
+    
+    def _pdfium_to_markdown(self, pdf_path: str) -> str:
+        """
+        Extract the text of a PDF with pypdfium2 as markdown
+        
+        Each line's font size is compared with the most common (body) size to
+        mark larger lines as headings. Pages are separated by blank lines.
+        
+        Args:
+            pdf_path: Path to PDF file
+        
+        Returns:
+            Markdown content as string
+        """
+        pages = list(self._pdfium_pages(pdf_path))
+        body_size = self._body_font_size(pages)
+        return '\n\n'.join(self._format_page(lines, body_size) for lines in pages)
+    
+    def _pdfium_write_markdown(self, pdf_path: str, f: IO[str]):
+        """
+        Write the markdown of a PDF extracted with pypdfium2, page by page
+        
+        The body font size depends on every page, so the text is extracted in
+        a first pass to measure it and again while writing, instead of keeping
+        all pages in memory.
+        
+        Args:
+            pdf_path: Path to PDF file
+            f: Text file to write to
+        """
+        body_size = self._body_font_size(self._pdfium_pages(pdf_path))
+        for page_index, lines in enumerate(self._pdfium_pages(pdf_path)):
+            if page_index:
+                f.write('\n\n')
+            f.write(self._format_page(lines, body_size))
+    
+    def _pdfium_pages(self, pdf_path: str) -> Iterator[List[Tuple[str, float]]]:
+        """
+        Extract the lines of each page of a PDF with pypdfium2
+        
+        Args:
+            pdf_path: Path to PDF file
+        
+        Yields:
+            Lines of each page as returned by _pdfium_page_lines
+        """
+        pdf = self._pdfium.PdfDocument(pdf_path)
+        try:
+            for page_index in range(len(pdf)):
+                page = pdf[page_index]
+                textpage = page.get_textpage()
+                try:
+                    yield self._pdfium_page_lines(textpage)
+                finally:
+                    textpage.close()
+                    page.close()
+        finally:
+            pdf.close()
     
     @staticmethod
-    def is_available() -> bool:
+    def _body_font_size(pages: Iterable[List[Tuple[str, float]]]) -> float:
+        """Font size covering the most characters, taken as the body text size"""
+        size_weights = Counter()
+        for lines in pages:
+            for text, size in lines:
+                size_weights[size] += len(text)
+        return size_weights.most_common(1)[0][0] if size_weights else 0
+    
+    def _format_page(self, lines: List[Tuple[str, float]], body_size: float) -> str:
+        """
+        Join a page's lines as markdown, marking lines in larger fonts as headings
+        
+        Args:
+            lines: Lines of the page as returned by _pdfium_page_lines
+            body_size: Body text font size
+        
+        Returns:
+            Markdown of the page
+        """
+        markdown_lines = []
+        for text, size in lines:
+            if body_size and text and len(text) <= self.MAX_HEADING_CHARS:
+                if size >= body_size * self.TITLE_SCALE:
+                    text = f"# {text}"
+                elif size >= body_size * self.HEADING_SCALE:
+                    text = f"## {text}"
+            markdown_lines.append(text)
+        return '\n'.join(markdown_lines)
+    
+    def _pdfium_page_lines(self, textpage) -> List[Tuple[str, float]]:
+        """
+        Split a page's text into lines with the font size of their first character
+        
+        Args:
+            textpage: pypdfium2 text page
+        
+        Returns:
+            List of (stripped line text, font size rounded to 0.1pt); the size is
+            0 for blank lines and when characters cannot be mapped to the text
+        """
+        text = textpage.get_text_range()
+        # Character indices only line up with the text when every character
+        # is a single code point
+        sized = len(text) == textpage.count_chars()
+        
+        lines = []
+        index = 0
+        for line in text.replace('\r\n', '\n').split('\n'):
+            stripped = line.strip()
+            size = 0.0
+            if sized and stripped:
+                first_char = index + len(line) - len(line.lstrip())
+                size = round(self._pdfium_c.FPDFText_GetFontSize(textpage, first_char), 1)
+            lines.append((stripped, size))
+            # Lines are separated by a generated "\r\n" pair
+            index += len(line) + 2
+        
+        return lines
+    
+    @staticmethod
+    def _collect_results(results, converted_files: List[str], errors: List[str],
+                         output_path: Path):
+        """
+        Log conversion results as they arrive and collect them
+        
+        Args:
+            results: Iterable of (pdf_path, output_file, error) tuples from _convert_one
+            converted_files: List that receives the paths of converted files
+            errors: List that receives error messages
+            output_path: Output folder as given by the caller; converted file
+                paths are reported relative to it like before
+        """
+        for pdf_path, output_file, error in results:
+            pdf_name = Path(pdf_path).name
+            if error is None:
+                output_file = str(output_path / Path(output_file).name)
+                converted_files.append(output_file)
+                logger.info("Converted %s -> %s", pdf_name, output_file)
+            else:
+                error_msg = f"Error converting {pdf_name}: {error}"
+                errors.append(error_msg)
+                logger.info("Failed %s: %s", pdf_name, error)
+    
+    @staticmethod
+    def is_available(backend: str = "pymupdf") -> bool:
         """
         Check if PDF parsing is available
         
+        Args:
+            backend: Backend to check ("pymupdf" or "pdfium")
+        
         Returns:
-            True if pymupdf4llm is available, False otherwise
+            True if the backend's package is available, False otherwise
         """
+        if backend == "pdfium":
+            return PYPDFIUM_AVAILABLE
         return PYMUPDF_AVAILABLE
@@ -1,19 +1,152 @@
+import hashlib
+import heapq
+import json
+import logging
 import os
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from operator import itemgetter
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
+from ..core.cache import SQLiteCache
+from ..core.files import compile_name_patterns, decode_text, find_files
 from ..core.text_processor import TextProcessor
 from ..core.config import ConfigManager
 from ..exceptions import FileProcessingError
 
+logger = logging.getLogger(__name__)
+
+class _DirectoryTokenCache:
+    """Token counts of a directory's files, stored in a JSON file in the directory"""
+    
+    FILENAME = ".contextF-tokcache.json"
+    
+    def __init__(self, directory: str, encoding: str, file_patterns: List[str], recursive: bool):
+        """
+        Load the cache of a directory
+        
+        Args:
+            directory: Directory whose files are counted
+            encoding: Tokenizer encoding; counts stored for another encoding are ignored
+            file_patterns: File patterns of the scan using the cache
+            recursive: Whether the scan includes subdirectories
+        """
+        self.root = os.path.abspath(directory)
+        self.path = os.path.join(self.root, self.FILENAME)
+        self.encoding = encoding
+        self.recursive = recursive
+        self._name_patterns = compile_name_patterns(file_patterns)
+        # Entries looked up or stored during this scan
+        self._seen: Dict[str, List[int]] = {}
+        
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._entries = data['files'] if data.get('encoding') == encoding else {}
+        except (OSError, ValueError, KeyError, AttributeError):
+            self._entries = {}
+    
+    def get(self, key: Tuple[str, int, int]) -> Optional[int]:
+        """
+        Get the token count of a file if it is unchanged since it was stored
+        
+        Args:
+            key: (absolute path, mtime_ns, size) of the file
+        
+        Returns:
+            Token count, or None on a miss
+        """
+        relative_path = os.path.relpath(key[0], self.root)
+        entry = self._entries.get(relative_path)
+        if entry is None or entry[0] != key[1] or entry[1] != key[2]:
+            return None
+        self._seen[relative_path] = entry
+        return entry[2]
+    
+    def put(self, key: Tuple[str, int, int], token_count: int):
+        """
+        Store the token count of a file
+        
+        Args:
+            key: (absolute path, mtime_ns, size) of the file
+            token_count: Number of tokens in the file
+        """
+        self._seen[os.path.relpath(key[0], self.root)] = [key[1], key[2], token_count]
+    
+    def save(self):
+        """
+        Write the cache, replacing the previous file atomically
+        
+        Entries of this scan are merged into the loaded ones. Loaded entries
+        inside the scan's scope that the scan did not see, and entries of
+        files that no longer exist, are dropped; the rest are kept so a
+        narrower scan does not discard the counts of a wider one.
+        """
+        files = {}
+        for relative_path, entry in self._entries.items():
+            if relative_path in self._seen or self._in_scope(relative_path):
+                continue
+            if os.path.isfile(os.path.join(self.root, relative_path)):
+                files[relative_path] = entry
+        files.update(self._seen)
+        
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'encoding': self.encoding, 'files': files}, f)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logger.warning("Could not save token cache %s: %s", self.path, e)
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+    def _in_scope(self, relative_path: str) -> bool:
+        """Whether the scan using this cache would have found the file"""
+        if not self.recursive and os.sep in relative_path:
+            return False
+        name = os.path.basename(relative_path)
+        return any(name_pattern.match(name) for name_pattern in self._name_patterns)
+
 class TokenCounter:
     """Utility class for counting tokens in files and directories"""
     
-    def __init__(self, encoding: str = "cl100k_base"):
+    # Number of per-file counts remembered in memory, keyed by path, mtime and size
+    FILE_CACHE_SIZE = 4096
+    # Number of files tokenized per batch by count_tokens_in_directory_batch
+    BATCH_SIZE = 256
+    # Number of threads reading files ahead of tokenization
+    READ_WORKERS = 8
+    # Files counted when no file patterns are given
+    DEFAULT_FILE_PATTERNS = ['*.md', '*.txt']
+    # Extended attribute holding a file's token count when xattr_cache is enabled
+    XATTR_NAME = "user.contextF.tokcount"
+    
+    def __init__(self, encoding: str = "cl100k_base", enable_cache: bool = False,
+                 cache_dir: str = "~/.cache/contextF", dir_cache: bool = False,
+                 xattr_cache: bool = False):
         """
         Initialize token counter
         
+        Counting uses runtoken's count-only API when runtoken is installed and
+        supports the encoding, and tiktoken through TextProcessor otherwise.
+        
         Args:
             encoding: Tokenizer encoding to use
+            enable_cache: Persist file token counts keyed by a hash of the file
+                content, so unchanged files are not tokenized again in later runs
+            cache_dir: Directory holding the cache database
+            dir_cache: Keep the token counts of a scanned directory's files in a
+                .contextF-tokcache.json file in that directory, keyed by file
+                mtime and size, so unchanged files are neither read nor hashed
+                in later runs
+            xattr_cache: Store each file's token count in an extended attribute
+                on the file itself, keyed by encoding, mtime and size. Ignored on
+                platforms and file systems without user extended attributes
+        
+        Raises:
+            ConfigurationError: If the cache is enabled but cannot be opened
         """
         # Create minimal config for text processor
         config = {
@@ -31,6 +164,26 @@ class TokenCounter:
         }
         
         self.text_processor = TextProcessor(config)
+        self.backend = "tiktoken"
+        self._count = self.text_processor.count_tokens
+        
+        try:
+            import runtoken
+            self._count = runtoken.get_encoding(encoding).count
+            self.backend = "runtoken"
+        except Exception:
+            # Not installed or encoding not supported; keep tiktoken
+            pass
+        
+        self.encoding = encoding
+        self.token_cache = SQLiteCache(cache_dir, 'token_counts') if enable_cache else None
+        # LRU cache of per-file token counts, keyed by _file_key
+        self._file_counts: "OrderedDict[Tuple[str, int, int], int]" = OrderedDict()
+        self.dir_cache = dir_cache
+        # Cache of the directory being scanned, if dir_cache is enabled
+        self._dir_cache: Optional[_DirectoryTokenCache] = None
+        # os.getxattr only exists on Linux
+        self.xattr_cache = xattr_cache and hasattr(os, 'getxattr')
     
     def count_tokens_in_file(self, file_path: str) -> int:
         """
@@ -50,15 +203,18 @@ class TokenCounter:
             if not file_obj.exists():
                 raise FileProcessingError(f"File not found: {file_path}")
             
-            with open(file_obj, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
+            key = self._file_key(file_path)
+            token_count = self._get_file_count(key)
+            if token_count is None:
+                token_count = self._count_contents([self._read_bytes(file_path)])[0]
+                self._put_file_count(key, token_count)
             
-            return self.text_processor.count_tokens(content)
+            return token_count
             
+        except FileProcessingError:
+            raise
         except Exception as e:
-            if isinstance(e, FileProcessingError):
-                raise
-            raise FileProcessingError(f"Error counting tokens in {file_path}: {e}")
+            raise FileProcessingError(f"Error counting tokens in {file_path}: {e}") from e
     
     def count_tokens_in_directory(self, 
                                  directory: str,
@@ -78,41 +234,281 @@ class TokenCounter:
         Raises:
             FileProcessingError: If directory cannot be accessed
         """
-        if file_patterns is None:
-            file_patterns = ['*.md', '*.txt']
-        
         try:
-            dir_path = Path(directory)
-            if not dir_path.exists():
-                raise FileProcessingError(f"Directory not found: {directory}")
-            
-            if not dir_path.is_dir():
-                raise FileProcessingError(f"Path is not a directory: {directory}")
-            
+            file_paths = self._find_files(directory, file_patterns, recursive)
+            self._open_dir_cache(directory, file_patterns, recursive)
             file_token_counts = {}
             
-            # Get all matching files
-            for pattern in file_patterns:
-                if recursive:
-                    files = dir_path.rglob(pattern)
-                else:
-                    files = dir_path.glob(pattern)
-                
-                for file_path in files:
-                    if file_path.is_file():
-                        try:
-                            token_count = self.count_tokens_in_file(str(file_path))
-                            file_token_counts[str(file_path)] = token_count
-                        except FileProcessingError as e:
-                            print(f"Warning: {e}")
-                            continue
+            for file_path in file_paths:
+                try:
+                    token_count = self.count_tokens_in_file(file_path)
+                    file_token_counts[file_path] = token_count
+                except FileProcessingError as e:
+                    logger.warning("%s", e)
+                    continue
             
+            self._save_dir_cache()
             return file_token_counts
             
+        except FileProcessingError:
+            raise
+        except Exception as e:
+            raise FileProcessingError(f"Error counting tokens in directory {directory}: {e}") from e
+        finally:
+            self._dir_cache = None
+    
+    def count_tokens_in_directory_batch(self,
+                                        directory: str,
+                                        file_patterns: Optional[List[str]] = None,
+                                        recursive: bool = True) -> Dict[str, int]:
+        """
+        Count tokens in all matching files in a directory, tokenizing files in batches
+        
+        Files are tokenized BATCH_SIZE at a time with a single batched
+        tokenizer call each, which tiktoken spreads over several threads.
+        The next batch is read by background threads while the current one
+        is tokenized. Results are the same as count_tokens_in_directory.
+        
+        Args:
+            directory: Path to directory
+            file_patterns: List of file patterns to match (default: ['*.md', '*.txt'])
+            recursive: Whether to search recursively
+        
+        Returns:
+            Dictionary mapping file paths to token counts
+        
+        Raises:
+            FileProcessingError: If directory cannot be accessed
+        """
+        try:
+            file_paths = self._find_files(directory, file_patterns, recursive)
+            self._open_dir_cache(directory, file_patterns, recursive)
+            batches = [file_paths[start:start + self.BATCH_SIZE]
+                       for start in range(0, len(file_paths), self.BATCH_SIZE)]
+            counts_by_path = {}
+            
+            with ThreadPoolExecutor(max_workers=self.READ_WORKERS) as executor:
+                reads = self._submit_reads(executor, batches[0], counts_by_path) if batches else []
+                for index in range(len(batches)):
+                    current_reads = reads
+                    if index + 1 < len(batches):
+                        reads = self._submit_reads(executor, batches[index + 1], counts_by_path)
+                    self._count_reads(current_reads, counts_by_path)
+            
+            self._save_dir_cache()
+            
+            # Keep the file order of count_tokens_in_directory
+            return {file_path: counts_by_path[file_path]
+                    for file_path in file_paths if file_path in counts_by_path}
+            
+        except FileProcessingError:
+            raise
         except Exception as e:
-            if isinstance(e, FileProcessingError):
-                raise
-            raise FileProcessingError(f"Error counting tokens in directory {directory}: {e}")
+            raise FileProcessingError(f"Error counting tokens in directory {directory}: {e}") from e
+        finally:
+            self._dir_cache = None
+    
+    def _submit_reads(self, executor: ThreadPoolExecutor, file_paths: List[str],
+                      counts_by_path: Dict[str, int]
+                      ) -> List[Tuple[str, Tuple[str, int, int], Future]]:
+        """
+        Start reading files that are not in the in-memory cache
+        
+        Cached counts are stored in counts_by_path right away. Files that
+        cannot be accessed are reported and left out.
+        
+        Args:
+            executor: Thread pool that reads the files
+            file_paths: Paths to files
+            counts_by_path: Dictionary receiving cached token counts
+        
+        Returns:
+            List of (file_path, cache key, future of the file's bytes)
+        """
+        reads = []
+        for file_path in file_paths:
+            try:
+                key = self._file_key(file_path)
+            except OSError as e:
+                logger.warning("Error counting tokens in %s: %s", file_path, e)
+                continue
+            
+            token_count = self._get_file_count(key)
+            if token_count is not None:
+                counts_by_path[file_path] = token_count
+            else:
+                reads.append((file_path, key, executor.submit(self._read_bytes, file_path)))
+        
+        return reads
+    
+    def _count_reads(self, reads: List[Tuple[str, Tuple[str, int, int], Future]],
+                     counts_by_path: Dict[str, int]):
+        """
+        Count tokens in files read by _submit_reads, in one batch
+        
+        Args:
+            reads: Reads returned by _submit_reads
+            counts_by_path: Dictionary receiving the token counts
+        """
+        pending = []
+        contents = []
+        for file_path, key, future in reads:
+            try:
+                contents.append(future.result())
+                pending.append((file_path, key))
+            except OSError as e:
+                logger.warning("Error counting tokens in %s: %s", file_path, e)
+        
+        for (file_path, key), token_count in zip(pending, self._count_contents(contents)):
+            self._put_file_count(key, token_count)
+            counts_by_path[file_path] = token_count
+    
+    @staticmethod
+    def _read_bytes(file_path: str) -> bytes:
+        """Read a whole file as bytes"""
+        with open(file_path, 'rb') as f:
+            return f.read()
+    
+    def _count_contents(self, contents: List[bytes]) -> List[int]:
+        """
+        Count tokens in file contents, consulting the persistent cache first
+        
+        Contents not found in the cache are decoded and counted in one batch.
+        
+        Args:
+            contents: Raw file contents
+        
+        Returns:
+            Number of tokens for each content, in input order
+        """
+        token_counts: List[Optional[int]] = [None] * len(contents)
+        cache_keys = []
+        if self.token_cache is not None:
+            for i, data in enumerate(contents):
+                digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+                cache_keys.append(f"{self.encoding}|{digest}")
+                token_counts[i] = self.token_cache.get(cache_keys[i])
+        
+        missing = [i for i, token_count in enumerate(token_counts) if token_count is None]
+        if missing:
+            new_counts = self._count_batch([decode_text(contents[i]) for i in missing])
+            for i, token_count in zip(missing, new_counts):
+                token_counts[i] = token_count
+            
+            if self.token_cache is not None:
+                self.token_cache.set_many((cache_keys[i], token_counts[i]) for i in missing)
+        
+        return token_counts
+    
+    def _count_batch(self, texts: List[str]) -> List[int]:
+        """Count tokens for several texts with the active backend"""
+        if self.backend == "runtoken":
+            return [self._count(text) for text in texts]
+        return self.text_processor.count_tokens_batch(texts)
+    
+    @staticmethod
+    def _file_key(file_path: str) -> Tuple[str, int, int]:
+        """In-memory cache key of a file; a changed file gets a new mtime or size"""
+        stat = os.stat(file_path)
+        return (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+    
+    def _get_file_count(self, key: Tuple[str, int, int]) -> Optional[int]:
+        """Get a token count from the in-memory cache, then the directory cache, then the file's xattr"""
+        token_count = self._file_counts.get(key)
+        if token_count is not None:
+            self._file_counts.move_to_end(key)
+            if self._dir_cache is not None:
+                self._dir_cache.put(key, token_count)
+        elif self._dir_cache is not None:
+            token_count = self._dir_cache.get(key)
+        
+        if token_count is None and self.xattr_cache:
+            token_count = self._get_xattr_count(key)
+            if token_count is not None and self._dir_cache is not None:
+                self._dir_cache.put(key, token_count)
+        return token_count
+    
+    def _put_file_count(self, key: Tuple[str, int, int], token_count: int):
+        """Store a token count in the in-memory cache and the directory cache"""
+        self._file_counts[key] = token_count
+        if len(self._file_counts) > self.FILE_CACHE_SIZE:
+            self._file_counts.popitem(last=False)
+        if self._dir_cache is not None:
+            self._dir_cache.put(key, token_count)
+        if self.xattr_cache:
+            self._set_xattr_count(key, token_count)
+    
+    def _get_xattr_count(self, key: Tuple[str, int, int]) -> Optional[int]:
+        """Read a token count stored on the file, if it matches the encoding, mtime and size"""
+        try:
+            value = os.getxattr(key[0], self.XATTR_NAME).decode('ascii')
+            encoding, mtime_ns, size, token_count = value.rsplit(':', 3)
+            if encoding != self.encoding or (int(mtime_ns), int(size)) != key[1:]:
+                return None
+            return int(token_count)
+        except (OSError, ValueError):
+            # No attribute, unsupported file system, or a malformed value
+            return None
+    
+    def _set_xattr_count(self, key: Tuple[str, int, int], token_count: int):
+        """Store a token count on the file, ignoring file systems that refuse it"""
+        value = f"{self.encoding}:{key[1]}:{key[2]}:{token_count}"
+        try:
+            os.setxattr(key[0], self.XATTR_NAME, value.encode('ascii'))
+        except OSError:
+            pass
+    
+    def _open_dir_cache(self, directory: str, file_patterns: Optional[List[str]], recursive: bool):
+        """Load the cache of a directory about to be scanned, if dir_cache is enabled"""
+        if not self.dir_cache:
+            self._dir_cache = None
+            return
+        if file_patterns is None:
+            file_patterns = self.DEFAULT_FILE_PATTERNS
+        self._dir_cache = _DirectoryTokenCache(directory, self.encoding, file_patterns, recursive)
+    
+    def _save_dir_cache(self):
+        """Save the cache of the scanned directory, if dir_cache is enabled"""
+        if self._dir_cache is not None:
+            self._dir_cache.save()
+    
+    def _find_files(self,
+                    directory: str,
+                    file_patterns: Optional[List[str]] = None,
+                    recursive: bool = True) -> List[str]:
+        """
+        Find the files to count in a directory
+        
+        Patterns are matched like Path.rglob (Path.glob if not recursive) would:
+        against file names, or against paths below directory when they contain
+        a separator (e.g. 'sub/*.md').
+        
+        Args:
+            directory: Path to directory
+            file_patterns: List of file patterns to match (default: ['*.md', '*.txt'])
+            recursive: Whether to search recursively
+        
+        Returns:
+            Paths of matching files, each listed once
+        
+        Raises:
+            FileProcessingError: If directory cannot be accessed
+        """
+        if file_patterns is None:
+            file_patterns = self.DEFAULT_FILE_PATTERNS
+        
+        dir_path = Path(directory)
+        if not dir_path.exists():
+            raise FileProcessingError(f"Directory not found: {directory}")
+        
+        if not dir_path.is_dir():
+            raise FileProcessingError(f"Path is not a directory: {directory}")
+        
+        # The directory cache file is never counted itself; paths are compared
+        # absolute since find_files yields '.'-relative paths without a prefix
+        cache_path = os.path.join(os.path.abspath(directory), _DirectoryTokenCache.FILENAME)
+        return [file_path for file_path in find_files(directory, file_patterns, recursive)
+                if os.path.abspath(file_path) != cache_path]
     
     def get_directory_summary(self, 
                             directory: str,
@@ -130,7 +526,7 @@ class TokenCounter:
             Dictionary containing summary statistics
         """
         try:
-            file_counts = self.count_tokens_in_directory(directory, file_patterns, recursive)
+            file_counts = self.count_tokens_in_directory_batch(directory, file_patterns, recursive)
             
             if not file_counts:
                 return {
@@ -154,14 +550,17 @@ class TokenCounter:
                 'files': file_counts
             }
             
+        except FileProcessingError:
+            raise
         except Exception as e:
-            raise FileProcessingError(f"Error generating directory summary: {e}")
+            raise FileProcessingError(f"Error generating directory summary: {e}") from e
     
     def print_directory_report(self, 
                              directory: str,
                              file_patterns: Optional[List[str]] = None,
                              recursive: bool = True,
-                             sort_by_tokens: bool = True):
+                             sort_by_tokens: bool = True,
+                             top_k: Optional[int] = None):
         """
         Print a detailed report of token counts in a directory
         
@@ -170,27 +569,35 @@ class TokenCounter:
             file_patterns: List of file patterns to match
             recursive: Whether to search recursively
             sort_by_tokens: Whether to sort files by token count
+            top_k: Only list the top_k files with the most tokens (all files if None)
         """
         try:
             summary = self.get_directory_summary(directory, file_patterns, recursive)
             
-            print(f"Token Count Report for: {directory}")
-            print("=" * 60)
-            print(f"Total files: {summary['total_files']}")
-            print(f"Total tokens: {summary['total_tokens']:,}")
-            print(f"Average tokens per file: {summary['average_tokens']:,}")
-            print(f"Min tokens: {summary['min_tokens']:,}")
-            print(f"Max tokens: {summary['max_tokens']:,}")
-            print("\nPer-file breakdown:")
-            print("-" * 60)
-            
-            files = summary['files']
-            if sort_by_tokens:
-                files = dict(sorted(files.items(), key=lambda x: x[1], reverse=True))
-            
-            for file_path, token_count in files.items():
+            report = [
+                f"Token Count Report for: {directory}",
+                "=" * 60,
+                f"Total files: {summary['total_files']}",
+                f"Total tokens: {summary['total_tokens']:,}",
+                f"Average tokens per file: {summary['average_tokens']:,}",
+                f"Min tokens: {summary['min_tokens']:,}",
+                f"Max tokens: {summary['max_tokens']:,}",
+                "\nPer-file breakdown:",
+                "-" * 60
+            ]
+            
+            files = summary['files'].items()
+            if top_k is not None:
+                files = heapq.nlargest(top_k, files, key=itemgetter(1))
+            elif sort_by_tokens:
+                files = sorted(files, key=itemgetter(1), reverse=True)
+            
+            for file_path, token_count in files:
                 filename = Path(file_path).name
-                print(f"{filename:<40} {token_count:>10,} tokens")
+                report.append(f"{filename:<40} {token_count:>10,} tokens")
+            
+            # Printed in one write rather than per line
+            print('\n'.join(report))
             
         except Exception as e:
             print(f"Error generating report: {e}")
@@ -205,4 +612,4 @@ class TokenCounter:
         Returns:
             Number of tokens
         """
-        return self.text_processor.count_tokens(text)
+        return self._count(text)
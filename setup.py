@@ -40,6 +40,9 @@ setup(
     ],
     extras_require={
         "pdf": ["pymupdf4llm"],
+        "pdfium": ["pypdfium2"],
+        "search": ["ahocorasick-rs", "xxhash"],
+        "semantic": ["sentence-transformers", "faiss-cpu"],
         "dev": [
             "pytest>=7.0.0",
             "pytest-cov>=4.0.0",
@@ -4,6 +4,7 @@ Simple test script for contextF library functionality
 
 import sys
 import os
+import tempfile
 
 # Add contextF to path
 sys.path.insert(0, './contextF')
@@ -78,6 +79,64 @@ def test_with_dependencies():
         print(f"✗ Test failed: {e}")
         return False
 
+def test_search_paths_agree():
+    """Test that the line scan, str.find and mmap search paths find the same matches"""
+    print("\nTesting search paths...")
+    print("-" * 40)
+    
+    from contextF.core.config import ConfigManager
+    from contextF.core.search import SearchEngine
+    
+    class LineScanEngine(SearchEngine):
+        """Search engine that scans every file line by line"""
+        
+        def _scan_content(self, compiled, cached_file):
+            return self._scan_lines(compiled, cached_file.lines)
+    
+    files = {
+        'plain.md': "Alpha beta\ngamma\n\nDELTA alpha alpha\nnothing here\nepsilon zeta eta theta\n",
+        'no_newline.md': "theta\nbeta gamma\nlast line alpha",
+        'crlf.md': "alpha\r\nBeta\r\n\r\ngamma delta\r\n",
+        'cr.md': "alpha\rbeta\rgamma",
+        'unicode.md': "Ünïcode alpha\nplain beta\nstraße gamma\nΔelta delta\n",
+        'long.md': "filler line\n" * 500 + "alpha beta gamma delta\n" + "filler\n" * 500 + "eta\n",
+        'empty.md': "",
+    }
+    patterns_sets = [
+        ['alpha'],
+        ['alpha', 'gamma', 'missing'],
+        ['alpha', 'beta', 'gamma', 'delta', 'epsilon', 'zeta', 'eta', 'theta', 'line'],
+    ]
+    
+    with tempfile.TemporaryDirectory() as docs_path:
+        for name, content in files.items():
+            with open(os.path.join(docs_path, name), 'w', encoding='utf-8', newline='') as f:
+                f.write(content)
+        
+        for case_sensitive in (False, True):
+            for max_matches in (3, 1000):
+                config = dict(ConfigManager().get_search_config(),
+                              case_sensitive=case_sensitive, max_matches_per_file=max_matches)
+                engines = {
+                    'line scan': LineScanEngine(dict(config, mmap_threshold=None)),
+                    'str.find': SearchEngine(dict(config, mmap_threshold=None)),
+                    'mmap': SearchEngine(dict(config, mmap_threshold=0)),
+                }
+                for patterns in patterns_sets:
+                    results = {
+                        name: {filename: matches.to_columns() for filename, matches
+                               in engine.search_files(patterns, docs_path, ['*.md']).items()}
+                        for name, engine in engines.items()
+                    }
+                    assert results['line scan'], f"No matches for {patterns}"
+                    assert results['str.find'] == results['line scan'], \
+                        f"str.find differs for {patterns} (case_sensitive={case_sensitive})"
+                    assert results['mmap'] == results['line scan'], \
+                        f"mmap differs for {patterns} (case_sensitive={case_sensitive})"
+    
+    print("✓ Line scan, str.find and mmap searches found the same matches")
+    return True
+
 def main():
     """Run all tests"""
     print("contextF Library Test Suite")
@@ -92,6 +151,10 @@ def main():
     else:
         dep_success = False
     
+    # Test search internals
+    if dep_success:
+        dep_success = test_search_paths_agree()
+    
     print("\n" + "=" * 50)
     if basic_success and dep_success:
         print("ALL TESTS PASSED! 🎉")